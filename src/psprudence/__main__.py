@@ -19,22 +19,32 @@
 #
 """Command-line EntryPoint."""
 
+import os
 import platform
-from os import environ
+import sys
 from pathlib import Path
-from time import sleep
-from typing import Dict, Optional, Sequence
+from time import monotonic, perf_counter, time
+from typing import Dict, Iterable, Optional, Sequence, Set
 
 from xdgpspconf import ConfDisc
 
-from psprudence import print
+from psprudence import config_cache, events, print, streams, workers
+from psprudence.bar import BarStream
 from psprudence.command_line import cli
 from psprudence.initialize import init_call
-from psprudence.prudence import Prudence, create_alerts
+from psprudence.overhead import Overhead
+from psprudence.power import PowerProfiles
+from psprudence.prudence import (BuildReport, Prudence, create_alerts,
+                                 prepare)
+from psprudence.replay import replay
+from psprudence.schedule import TickBudget
+from psprudence.sdnotify import Notifier
 from psprudence.shell_comm import notify
+from psprudence.status import StatusWriter
+from psprudence.trace import Recorder
 
 
-def read_configs(custom: Optional[Path] = None):
+def read_configs(custom: Optional[Path] = None, cache: bool = True):
     """
     Combine configurations.
 
@@ -42,9 +52,17 @@ def read_configs(custom: Optional[Path] = None):
     -----
     custom : path, optional
         Custom configuration location
+    cache : bool
+        Use cached configuration if no configuration file has changed.
+        See :mod:`psprudence.config_cache`.
     """
-    configs = list(
-        ConfDisc('psprudence', __file__).read_config(custom=custom).values())
+    disc = ConfDisc('psprudence', __file__)
+    sources = disc.get_conf(custom=custom, mode=4)
+    if cache:
+        config = config_cache.load(sources, custom)
+        if config is not None:
+            return config
+    configs = list(disc.read_config(custom=custom).values())
     config = {}
     for vals in reversed(configs):
         for alert in vals:
@@ -52,13 +70,70 @@ def read_configs(custom: Optional[Path] = None):
                 config[alert].update(vals[alert])
             else:
                 config[alert] = vals[alert]
+    if cache:
+        config_cache.store(sources, config, custom)
     return config
 
 
+def report_failures(built: BuildReport) -> Set[str]:
+    """
+    Report all handles that failed to build, together.
+
+    Parameters
+    -----------
+    built : BuildReport
+        output of :func:`psprudence.prudence.prepare`
+
+    Returns
+    --------
+    Set[str]
+        names of sensors with failed handles
+    """
+    failed = {
+        job: err
+        for job, (_, err) in built.items() if err is not None
+    }
+    for (name, handle), err in failed.items():
+        print(f'{name} {handle}: {type(err).__name__}: {err}', mark='err')
+    return {name for name, _ in failed}
+
+
+def check_config(custom: Optional[Path] = None) -> int:
+    """
+    Validate configuration: build every handle and show its build time.
+
+    Parameters
+    -----------
+    custom : Path, optional
+        custom configuration
+
+    Returns
+    --------
+    int
+        exit code: 1 if any handle failed to build
+    """
+    config = read_configs(custom)
+    workers.POOL_OPTS.update(config.get('global', {}).get('workers', {}))
+    peripherals = create_alerts(config)
+    built = prepare(peripherals)
+    workers.close_pool()
+    streams.stop_all()
+    for (name, handle), (secs, err) in built.items():
+        print(f'{name:<16} {handle:<14} {secs * 1000:8.2f} ms',
+              mark='err' if err else 'info')
+    failed = report_failures(built)
+    print(f'{len(peripherals)} sensors, {len(built)} handles built, '
+          f'{len(failed)} sensors failed.',
+          mark='err' if failed else 'info')
+    return 1 if failed else 0
+
+
 def main_loop(interval: float = 0,
               disable: Sequence[str] = '',
               debug: bool = False,
-              custom: Optional[Path] = None) -> int:
+              custom: Optional[Path] = None,
+              record: Optional[Path] = None,
+              bar: Optional[str] = None) -> int:
     """
     Main monitoring loop
 
@@ -72,17 +147,29 @@ def main_loop(interval: float = 0,
         print debugging output
     custom : Path, optional
         custom configuration
+    record : Path, optional
+        record every tick's values to this binary trace
+    bar : {i3bar, waybar}, optional
+        stream status to stdout in this status-bar protocol.
+        All other output is diverted to stderr.
 
     Returns
     --------
     int
         exit code
     """
+    if bar is not None:
+        # keep stdout exclusively for status-bar protocol
+        bar_out = os.fdopen(os.dup(sys.stdout.fileno()), 'w')
+        sys.stdout.flush()
+        os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
     config = read_configs(custom)
 
     persist: int = config.get('global', {'persist': 5})['persist']
     if not interval:
         interval = config.get('global', {'interval': 10.})['interval']
+    workers.POOL_OPTS.update(config.get('global', {}).get('workers', {}))
 
     # filter
     peripherals: Dict[str, Prudence] = {
@@ -101,30 +188,112 @@ def main_loop(interval: float = 0,
               indent=1)
         print(f'interval: {interval}', mark='bug')
 
+    for name in report_failures(prepare(peripherals)):
+        print(f'Disabling {name}.', mark='warn')
+        del peripherals[name]
+
+    frozen = [(name, mon, mon.freeze()) for name, mon in peripherals.items()]
+    recorder = None if record is None else Recorder(record, list(peripherals))
+    status = StatusWriter(list(peripherals))
+    stream = None if bar is None else BarStream(
+        [(name, mon) for name, mon, _ in frozen], bar, bar_out)
+    overhead = Overhead(list(peripherals),
+                        **config.get('global', {}).get('overhead', {}))
+    power = PowerProfiles(peripherals, interval,
+                          **config.get('global', {}).get('power', {}))
+    budget = TickBudget(list(peripherals),
+                        [mon.priority for mon in peripherals.values()],
+                        config.get('global', {}).get('tick_budget'))
+    notifier = Notifier()
+    notifier.ready(f'{len(frozen)} sensors')
+
+    def run(sensors: Iterable[int], defer: bool = True) -> int:
+        """Tick sensors, publish their state, notify alerts."""
+        events.next_tick()
+        alert = []
+        stamp = time()
+        begun = perf_counter()
+        for sensor in sensors:
+            if defer and budget.defer(sensor, perf_counter() - begun):
+                continue
+            name, mon, tick = frozen[sensor]
+            was_enabled = mon.enabled
+            start = overhead.start()
+            began = perf_counter()
+            events.running(sensor)
+            mon_alert = tick()
+            events.running(None)
+            budget.charge(sensor, perf_counter() - began)
+            overhead.charge(sensor, start)
+            if recorder is not None and was_enabled:
+                recorder.record(stamp, sensor, mon.value, mon.outcome)
+            if debug:
+                print(name, 'enabled' * mon.enabled, mon_alert, mark='bug')
+            if mon_alert is not None:
+                alert.append(mon_alert)
+        status.publish(stamp, ((mon.value, mon.outcome)
+                               for _, mon, _ in frozen))
+        if stream is not None:
+            stream.update()
+        if alert:
+            notify('\n'.join(alert), timeout=persist)
+        return len(alert)
+
     try:
         # It is bad to use a "while true loop"
         # The following loop runs for almost 70 years if interval is 1 second
-        for _ in range(0x7fffffff):
-            alert = []
-            for name, mon in peripherals.items():
-                mon_alert = mon()
-                if debug:
-                    print(name, 'enabled' * mon.enabled, mon_alert, mark='bug')
-                if mon_alert is not None:
-                    alert.append(mon_alert)
-            if alert:
-                notify('\n'.join(alert), timeout=persist)
-            sleep(interval)
+        for count in range(0x7fffffff):
+            latency = perf_counter()
+            due = [
+                sensor for sensor in range(len(frozen))
+                if not power.skip[sensor] and overhead.due(sensor, count)
+            ]
+            alerts = run(budget.order(due))
+            latency = perf_counter() - latency
+            closed = overhead.tick()
+            if power.update(overhead, closed):
+                print(f'Power profile: {power.profile}', mark='info')
+            if closed and debug:
+                print(overhead.report(), mark='bug')
+                print('deferred:', budget.report(), mark='bug')
+            notifier.heartbeat(f'tick {latency * 1000:.1f} ms, '
+                               f'{alerts} alerts, '
+                               f'{sum(budget.deferred)} deferred')
+            deadline = monotonic() + power.timeout()
+            while notifier.wait(max(deadline - monotonic(), 0.)):
+                woken = events.woken()
+                if woken is None:
+                    break  # full tick now
+                # only sensors of the event; periodic schedule is kept
+                run(sorted(woken), defer=False)
     except (KeyboardInterrupt, InterruptedError):
         print("Caught interrupt, quitting safely.", mark=1)
         return 0
+    except BrokenPipeError:
+        # status bar quit
+        return 0
+    finally:
+        notifier.stopping()
+        status.close()
+        workers.close_pool()
+        streams.stop_all()
+        if recorder is not None:
+            recorder.close()
 
 
 def main() -> int:
     cliargs = cli()
     if cliargs.get('call', 'monitor') == 'init':
         return init_call(**cliargs)
-    if platform.system() == 'Linux' and not environ.get('DISPLAY'):
+    if cliargs.get('call') == 'check':
+        return check_config(cliargs.get('custom'))
+    if cliargs.get('call') == 'replay':
+        return replay(cliargs['traces'], read_configs(cliargs.get('custom')),
+                      quiet=cliargs.get('quiet', False))
+    if (platform.system() == 'Linux' and cliargs.get('bar') is None
+            and not (os.environ.get('DISPLAY')
+                     or os.environ.get('WAYLAND_DISPLAY'))):
+        # a status bar draws alerts itself
         print('PSPrudent needs graphical interface.', mark='err')
         return 1
     if 'call' in cliargs:
@@ -133,4 +302,4 @@ def main() -> int:
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
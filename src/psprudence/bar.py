@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Stream status of sensors to status bars.
+
+Monitor may itself be the long-running status-bar block, writing one
+record per tick to stdout:
+
+i3bar
+    `i3bar protocol <https://i3wm.org/docs/i3bar-protocol.html>`__:
+    one block per sensor. Also understood by swaybar and i3blocks.
+waybar
+    one JSON object per line for a waybar ``custom`` module with
+    ``return-type: json``: ``text``, ``tooltip``, ``class``.
+
+Serialized fragment of each sensor is cached and re-serialized only
+when the sensor's value or outcome changes.
+"""
+
+import json
+import sys
+from typing import List, Optional, TextIO, Tuple
+
+from psprudence.prudence import ALERT, FLAGGED, QUIET, Prudence
+
+PROTOCOLS = ('i3bar', 'waybar')
+"""Supported status-bar protocols."""
+
+
+class BarStream():
+    """
+    Write status of sensors once per tick.
+
+    Parameters
+    -----------
+    sensors : List[Tuple[str, Prudence]]
+        (name, sensor) in display order
+    protocol : {i3bar, waybar}
+        status-bar protocol
+    stream : TextIO, optional
+        output [default: stdout]
+    """
+
+    def __init__(self,
+                 sensors: List[Tuple[str, Prudence]],
+                 protocol: str = 'i3bar',
+                 stream: Optional[TextIO] = None):
+        if protocol not in PROTOCOLS:
+            raise ValueError(f'Unknown status-bar protocol: {protocol}')
+        self.sensors = sensors
+        self.protocol = protocol
+        self.stream = stream or sys.stdout
+        self._state: List[Tuple[object, int]] = [(None, -1)] * len(sensors)
+        self._fragments: List[Optional[str]] = [None] * len(sensors)
+        self._urgent: List[bool] = [False] * len(sensors)
+        if protocol == 'i3bar':
+            self.stream.write('{"version": 1}\n[\n[]\n')
+            self.stream.flush()
+
+    @staticmethod
+    def _text(mon: Prudence) -> str:
+        """Human-readable value."""
+        if isinstance(mon.value, float):
+            return f'{mon.alert}: {mon.value:.1f}{mon.units}'
+        return f'{mon.alert}: {mon.value}{mon.units}'
+
+    def _serialize(self, index: int, name: str, mon: Prudence):
+        """(Re)serialize fragment of a sensor."""
+        urgent = mon.outcome in (ALERT, FLAGGED)
+        self._urgent[index] = urgent
+        if not (urgent or mon.outcome == QUIET) or mon.value is None:
+            # silenced or disabled: nothing to show
+            self._fragments[index] = None
+            return
+        text = self._text(mon)
+        if self.protocol == 'i3bar':
+            self._fragments[index] = json.dumps({
+                'name': name,
+                'full_text': text,
+                'urgent': urgent
+            })
+        else:
+            self._fragments[index] = json.dumps(text)[1:-1]
+
+    def update(self):
+        """Write status of all sensors, serializing only changed ones."""
+        for index, (name, mon) in enumerate(self.sensors):
+            state = (mon.value, mon.outcome)
+            if state != self._state[index]:
+                self._state[index] = state
+                self._serialize(index, name, mon)
+        fragments = [frag for frag in self._fragments if frag is not None]
+        if self.protocol == 'i3bar':
+            self.stream.write(',[' + ','.join(fragments) + ']\n')
+        else:
+            self.stream.write('{"text": "' + ' '.join(fragments) +
+                              '", "tooltip": "' + '\\n'.join(fragments) +
+                              '", "class": "' +
+                              ('alert' if any(self._urgent) else 'quiet') +
+                              '"}\n')
+        self.stream.flush()
@@ -17,33 +17,225 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with psprudence. If not, see <https://www.gnu.org/licenses/>.
 #
-"""Battery Handles (special case)."""
+"""
+Battery Handles (special case).
 
-from typing import Optional, Union
+On Linux, battery charge and plug state are updated from kernel
+``power_supply`` uevents received over netlink, so that probes cost
+nothing between events and unplugging wakes the monitoring loop
+immediately. Where netlink is unavailable, ``/sys/class/power_supply``
+is polled on each probe. Elsewhere, :func:`psutil.sensors_battery` is used.
+"""
+
+import socket
+import threading
+from functools import lru_cache
+from pathlib import Path
+from time import monotonic
+from typing import Dict, Optional, Tuple, Union
 
 import psutil
 
+from psprudence import print
+from psprudence.events import wake
 from psprudence.shell_comm import notify, process_comm
 
+POWER_SUPPLY = Path('/sys/class/power_supply')
+"""Linux power supply class."""
 
-def charge() -> Optional[Union[int, bool]]:
-    """Probe function for battery."""
+NETLINK_KOBJECT_UEVENT = 15
+"""Netlink protocol of kernel uevents."""
+
+
+class PowerSupply():
+    """
+    Battery charge and plug state.
+
+    Parameters
+    -----------
+    root : Path
+        power supply class directory
+    listen : bool
+        listen to kernel uevents. If ``False`` or if netlink is
+        unavailable, ``root`` is polled on each read.
+    resync : float
+        seconds after which state is re-read from ``root`` even while
+        listening, in case a driver does not emit uevents on every change
+    """
+
+    def __init__(self,
+                 root: Path = POWER_SUPPLY,
+                 listen: bool = True,
+                 resync: float = 300.):
+        self.root = root
+        self.resync = resync
+        self.supplies: Dict[str, Dict[str, str]] = {}
+        """uevent properties of each power supply, by name."""
+
+        self.percent: Optional[float] = None
+        """Battery charge percent, ``None`` if there is no battery."""
+
+        self.plugged: bool = True
+        """Power is plugged."""
+
+        self._synced = -float('inf')
+        self._sock: Optional[socket.socket] = None
+        self._lock = threading.Lock()
+        self.sync()
+        if listen:
+            self._sock = self._open_netlink()
+        if self._sock is not None:
+            threading.Thread(target=self._listen,
+                             name='psprudence-uevent',
+                             daemon=True).start()
+
+    @property
+    def listening(self) -> bool:
+        """State is updated from kernel uevents."""
+        return self._sock is not None
+
+    @staticmethod
+    def _open_netlink() -> Optional[socket.socket]:
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM,
+                                 NETLINK_KOBJECT_UEVENT)
+            sock.bind((0, 1))  # kernel broadcast group
+        except (AttributeError, OSError):
+            return None
+        return sock
+
+    def sync(self):
+        """(Re)read state of every power supply from sysfs."""
+        supplies = {}
+        try:
+            supply_dirs = list(self.root.iterdir())
+        except OSError:
+            supply_dirs = []
+        for supply_dir in supply_dirs:
+            try:
+                uevent = (supply_dir / 'uevent').read_text()
+            except OSError:
+                continue
+            supplies[supply_dir.name] = dict(
+                line.split('=', 1) for line in uevent.splitlines()
+                if '=' in line)
+        with self._lock:
+            self.supplies = supplies
+            self._synced = monotonic()
+            self._update()
+
+    def _update(self) -> bool:
+        """
+        Aggregate state of all supplies. Caller holds the lock.
+
+        Returns
+        --------
+        bool
+            plug state changed
+        """
+        capacities = []
+        mains = []
+        discharging = False
+        for props in self.supplies.values():
+            kind = props.get('POWER_SUPPLY_TYPE')
+            if kind == 'Battery':
+                try:
+                    capacities.append(float(props['POWER_SUPPLY_CAPACITY']))
+                except (KeyError, ValueError):
+                    pass
+                status = props.get('POWER_SUPPLY_STATUS')
+                discharging |= status == 'Discharging'
+            elif 'POWER_SUPPLY_ONLINE' in props:
+                mains.append(props['POWER_SUPPLY_ONLINE'] == '1')
+        plugged = any(mains) if mains else not discharging
+        changed = plugged != self.plugged
+        self.percent = (sum(capacities) /
+                        len(capacities)) if capacities else None
+        self.plugged = plugged
+        return changed
+
+    def _listen(self):
+        """Receive uevents; on any failure, fall back to polling."""
+        try:
+            while True:
+                self._receive()
+        except Exception as err:  # fall back, whatever the cause
+            print(f'Battery uevents: {err!r}; polling instead.', mark='warn')
+        sock, self._sock = self._sock, None
+        if sock is not None:
+            sock.close()
+
+    def _receive(self):
+        """Receive a uevent, update changed supply."""
+        msg = self._sock.recv(16384)  # type: ignore [union-attr]
+        header, *fields = msg.decode(errors='replace').split('\0')
+        props = dict(field.split('=', 1) for field in fields if '=' in field)
+        if props.get('SUBSYSTEM') != 'power_supply':
+            return
+        if props.get('ACTION') != 'change':
+            # supplies (dis)appeared
+            self.sync()
+            wake()
+            return
+        name = props.get('POWER_SUPPLY_NAME', header.rsplit('/', 1)[-1])
+        with self._lock:
+            self.supplies[name] = props
+            changed = self._update()
+        if changed:
+            wake()
+
+    def state(self) -> Tuple[Optional[float], bool]:
+        """
+        Current state.
+
+        Returns
+        --------
+        Tuple[Optional[float], bool]
+            battery charge percent, power is plugged
+        """
+        if not self.listening or monotonic() - self._synced > self.resync:
+            self.sync()
+        with self._lock:
+            return self.percent, self.plugged
+
+
+@lru_cache(maxsize=None)
+def power_supply() -> Optional[PowerSupply]:
+    """Shared power supply state, ``None`` if sysfs is unavailable."""
+    if not POWER_SUPPLY.is_dir():
+        return None
+    return PowerSupply()
+
+
+def _battery() -> Tuple[Optional[float], bool]:
+    """Battery charge percent and plug state."""
+    supply = power_supply()
+    if supply is not None:
+        return supply.state()
     battery = psutil.sensors_battery()
     if battery is None:
+        return None, True
+    return battery.percent, battery.power_plugged
+
+
+def charge() -> Optional[Union[float, bool]]:
+    """Probe function for battery."""
+    percent, plugged = _battery()
+    if percent is None:
         return None
-    if not battery.power_plugged:
+    if not plugged:
         return False
-    return battery.percent
+    return percent
 
 
-def discharge() -> Optional[Union[int, bool]]:
+def discharge() -> Optional[Union[float, bool]]:
     """Probe function for battery."""
-    battery = psutil.sensors_battery()
-    if battery is None:
+    percent, plugged = _battery()
+    if percent is None:
         return None
-    if battery.power_plugged:
+    if plugged:
         return False
-    return battery.percent
+    return percent
 
 
 def panic(suspend_at: str = '10'):
@@ -26,6 +26,10 @@ Configuration strings may be of following formats
     - python: 'py: /absolute/path/to/py_file:func_name:arg1:arg2:...'
     - shell: 'sh: /absolute/path/to/sh_file:func_name:arg1:arg2:...'
     - system call: 'os: /absolute/path/to/executable:arg1:arg2:...'
+    - installed plugin: 'plugin: name:arg1:arg2:...'
+    - long-running producer: 'stream: shell command that keeps printing'
+
+- threshold expression (alert_check only): 'ex: val > 90 and rate(30) > 2'
 
 - multi-line shell code-block (str)
 
@@ -37,12 +41,20 @@ OS calls must be direct executables that print values in string format.
 import platform
 from pathlib import Path
 from tempfile import NamedTemporaryFile
-from typing import Callable, Dict, List, Optional, Union
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 from xdgpspconf import DataDisc
 
 from psprudence import print
+from psprudence.clock import now
+from psprudence.errors import ExpressionError
+from psprudence.events import current_tick
+from psprudence.expressions import compile_expression
+from psprudence.plugins import GROUP, plugin_index
 from psprudence.shell_comm import process_comm
+from psprudence.streams import StreamProbe
+from psprudence.workers import build_isolated_handle
 
 DATA_PATHS = DataDisc(project='psprudence', shipped=Path(__file__)).get_loc()
 
@@ -326,28 +338,285 @@ def build_os_handle(srcstr: str,
     return osfunc
 
 
+def build_plugin_handle(srcstr: str,
+                        util: str = 'UNKNOWN') -> Callable[..., Any]:
+    """
+    Parse string and return handle to an installed plugin sensor.
+
+    See :mod:`psprudence.plugins`.
+
+    Parameters
+    -----------
+    srcstr : str
+        plugin: name:arg1:arg2:...
+    util : str
+        name object that uses this constructor (used to elaborate debug)
+
+    Returns
+    --------
+    Callable[..., Any]
+        Handle to plugin function
+
+    Raises
+    -------
+    ModuleNotFoundError
+    ImportError
+    """
+    name, *plugargs = (part.strip()
+                       for part in srcstr.partition(': ')[2].split(':'))
+    try:
+        entry = plugin_index().get(name)
+        if entry is None:
+            raise ModuleNotFoundError(
+                f'No plugin named {name} in entry points group {GROUP}')
+        call: Callable[..., Any] = entry.load()
+    except (ModuleNotFoundError, ImportError, AttributeError) as err:
+        print(f'Error creating plugin handle for {util}', mark='err')
+        raise err
+
+    def plugfunc(*args, **kwargs):
+        return call(*plugargs, *args, **kwargs)
+
+    plugfunc.__doc__ = '\n'.join((f'Plugin function: {util}', '',
+                                  (call.__doc__
+                                   or 'No __doc__ in plugin function')))
+    return plugfunc
+
+
+def build_stream_handle(srcstr: str,
+                        util: str = 'UNKNOWN') -> Callable[[], Any]:
+    """
+    Parse string and start a streaming probe.
+
+    See :mod:`psprudence.streams`.
+
+    Parameters
+    -----------
+    srcstr : str
+        stream: shell command that keeps printing values
+    util : str
+        name object that uses this constructor (used to elaborate debug)
+
+    Returns
+    --------
+    Callable[[], Any]
+        Handle that returns latest value
+
+    Raises
+    -------
+    NotImplementedError
+    """
+    if platform.system() == "Windows":
+        raise NotImplementedError('Windows streaming probe is in future plan')
+    return StreamProbe(srcstr.partition(': ')[2].strip(), util)
+
+
+def build_ex_handle(srcstr: str,
+                    util: str = 'UNKNOWN') -> Callable[..., bool]:
+    """
+    Parse string and return compiled threshold expression handle.
+
+    See :mod:`psprudence.expressions`.
+
+    Parameters
+    -----------
+    srcstr : str
+        ex: val > min_warn and rate(30) > 2
+    util : str
+        name object that uses this constructor (used to elaborate debug)
+
+    Returns
+    --------
+    Callable[..., bool]
+        alert_check handle
+
+    Raises
+    -------
+    ExpressionError
+    """
+    try:
+        return compile_expression(srcstr[4:], util)
+    except ExpressionError as err:
+        print(f'Error compiling expression for {util}', mark='err')
+        raise err
+
+
 def build_func_handle(srcstr: str,
-                      util: str = 'UNKNOWN') -> Callable[..., Optional[str]]:
+                      util: str = 'UNKNOWN',
+                      isolate: bool = False) -> Callable[..., Optional[str]]:
     """
     Parse source string to generate a function handle
 
     Parameters
     -----------
     srcstr : str
-        source-string to parse (may begin with py: , os: , sh: )
+        source-string to parse
+        (may begin with py: , os: , sh: , ex: , plugin: , stream: )
     util : str
         name object that uses this constructor (used to elaborate debug)
+    isolate : bool
+        run ``py:`` function in a worker process,
+        see :mod:`psprudence.workers`
 
     Returns
     --------
     Callable
     """
+    if isolate and srcstr[:4] == 'py: ':
+        return build_isolated_handle(srcstr, util)
     sub_funcs: Dict[str, Callable[..., Optional[str]]] = {
         'py: ': build_py_handle,
         'os: ': build_os_handle,
         'sh: ': build_sh_handle,
         'ch: ': build_ch_handle,
+        'ex: ': build_ex_handle,
+        'plugin: ': build_plugin_handle,
+        'stream: ': build_stream_handle,
         'default': build_otf_handle
     }
-    builder = sub_funcs.get(srcstr[:4], build_otf_handle)
+    kind, sep, _ = srcstr.partition(': ')
+    builder = sub_funcs.get(kind + sep, build_otf_handle)
     return builder(srcstr, util)
+
+
+class SharedProbe():
+    """
+    Probe handle shared by all sensors with the same canonical probe.
+
+    The wrapped handle is called at most once per tick (see
+    :func:`psprudence.events.current_tick`): later callers in the same
+    tick receive its result.
+
+    Parameters
+    -----------
+    call : Callable[[], Any]
+        built probe handle
+    """
+
+    __slots__ = ('call', 'value', 'tick', 'stamp', 'calls', 'users')
+
+    def __init__(self, call: Callable[[], Any]):
+        self.call = call
+
+        self.value: Any = None
+        """Latest result."""
+
+        self.tick = 0
+        """Tick of latest call."""
+
+        self.stamp = float('-inf')
+        """Time of latest call."""
+
+        self.calls = 0
+        """Calls of wrapped handle."""
+
+        self.users = 0
+        """Sensors sharing this probe."""
+
+    def get(self, ttl: float = 0.) -> Any:
+        """
+        Result of a call in this tick or within ``ttl`` seconds.
+
+        Parameters
+        -----------
+        ttl : float
+            seconds for which latest result is reused across ticks
+        """
+        tick = current_tick()
+        stamp = now()
+        if (tick == 0 or tick != self.tick) and stamp - self.stamp >= ttl:
+            self.value = self.call()
+            self.stamp = stamp
+            self.calls += 1
+        self.tick = tick
+        return self.value
+
+
+SHARED_PROBES: Dict[Tuple[str, ...], SharedProbe] = {}
+"""Shared probes by canonical key."""
+
+_SHARED_LOCK = Lock()
+
+_BUILD_LOCKS: Dict[Tuple[str, ...], Lock] = {}
+"""Serialize builds of each shared probe (handles are built in threads)."""
+
+
+def probe_key(srcstr: str, isolate: bool = False) -> Tuple[str, ...]:
+    """
+    Canonical key of probe configuration string.
+
+    Probe configurations that differ only in spacing or source file
+    extension have the same key: (kind, file, function, arguments).
+
+    Parameters
+    -----------
+    srcstr : str
+        probe configuration string
+    isolate : bool
+        ``py:`` probe runs in a worker process
+
+    Returns
+    --------
+    Tuple[str, ...]
+        canonical key
+    """
+    kind, sep, spec = srcstr.partition(': ')
+    exts = {'py': ('.py', '.pyx'), 'sh': ('.sh', ), 'os': (), 'plugin': ()}
+    if kind == 'stream' and sep:
+        return ('stream', spec.strip())
+    if not sep or kind not in exts:
+        # in-line code
+        return ('otf', srcstr.strip())
+    base, *args = (part.strip() for part in spec.split(':'))
+    if Path(base).suffix in exts[kind]:
+        base = str(Path(base).with_suffix(''))
+    if kind == 'py' and isolate:
+        kind = 'isolated py'
+    return (kind, base, *args)
+
+
+def build_probe_handle(srcstr: str,
+                       util: str = 'UNKNOWN',
+                       isolate: bool = False,
+                       ttl: float = 0.) -> Callable[[], Any]:
+    """
+    Build probe handle, shared with other sensors that use same probe.
+
+    Identical probes (see :func:`probe_key`) are built once and called
+    once per tick; all sensors that use them share the result.
+
+    Parameters
+    -----------
+    srcstr : str
+        probe configuration string, see :func:`build_func_handle`
+    util : str
+        name object that uses this constructor (used to elaborate debug)
+    isolate : bool
+        run ``py:`` function in a worker process
+    ttl : float
+        seconds for which a result is reused across ticks
+        [default: 0, only within the same tick]
+
+    Returns
+    --------
+    Callable[[], Any]
+        probe handle
+    """
+    key = probe_key(srcstr, isolate)
+    with _SHARED_LOCK:
+        build_lock = _BUILD_LOCKS.setdefault(key, Lock())
+    with build_lock:
+        shared = SHARED_PROBES.get(key)
+        if shared is None:
+            if key[0] not in ('otf', 'stream'):
+                srcstr = srcstr.partition(': ')[0] + ': ' + ':'.join(key[1:])
+            shared = SharedProbe(build_func_handle(srcstr, util, isolate))
+            SHARED_PROBES[key] = shared
+        shared.users += 1
+    get = shared.get
+
+    def sharedfunc():
+        return get(ttl)
+
+    sharedfunc.__doc__ = f"""Shared probe {':'.join(key)}: {util}"""
+    return sharedfunc
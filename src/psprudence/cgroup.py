@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Control group (cgroup v2) interface files.
+
+Sensors of a systemd slice, service or container read its cgroup,
+named by its path below :data:`CGROUP` as listed in ``/proc/<pid>/cgroup``,
+e.g. ``system.slice/docker.service`` or ``user.slice``.
+
+Interface files are opened on first use and kept open; each tick only
+re-reads them. A file is reopened if its cgroup was removed and created
+again (e.g. service restart).
+
+Usage is reported against the cgroup's own limit (``memory.max``,
+``cpu.max``, ``pids.max``). An unlimited cgroup is bounded by the
+nearest limited ancestor, else by the host.
+"""
+
+import os
+from functools import lru_cache
+from pathlib import Path
+from time import monotonic
+from typing import Dict, Optional, Tuple
+
+from psprudence.events import current_tick
+
+CGROUP = Path('/sys/fs/cgroup')
+"""Mount point of the unified (v2) cgroup hierarchy."""
+
+Sample = Tuple[float, Dict[str, int]]
+
+
+def cgroup_dir(path: str) -> Path:
+    """Directory of cgroup at ``path`` below :data:`CGROUP`."""
+    return CGROUP / path.strip().strip('/')
+
+
+def parse_keyed(text: str) -> Dict[str, int]:
+    """Parse flat keyed file (``key value`` lines)."""
+    counts = {}
+    for line in text.splitlines():
+        key, _, value = line.partition(' ')
+        try:
+            counts[key] = int(value)
+        except ValueError:
+            continue
+    return counts
+
+
+class CgroupFiles():
+    """
+    Kept-open cgroup interface files.
+
+    A sample of counters is shared by the sensors of the same tick (see
+    :func:`psprudence.events.current_tick`).
+    """
+
+    def __init__(self):
+        self._fds: Dict[Path, int] = {}
+        self._samples: Dict[Path, Tuple[Optional[Sample], Sample]] = {}
+        self._ticks: Dict[Path, int] = {}
+
+    @staticmethod
+    def available() -> bool:
+        """Unified cgroup hierarchy is mounted."""
+        return (CGROUP / 'cgroup.controllers').is_file()
+
+    def _close(self, path: Path):
+        fd = self._fds.pop(path, None)
+        if fd is not None:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def read(self, path: Path) -> str:
+        """
+        Read interface file.
+
+        Parameters
+        -----------
+        path : Path
+            interface file
+
+        Raises
+        -------
+        OSError
+            cgroup or its controller does not exist
+        """
+        fd = self._fds.get(path)
+        if fd is not None:
+            try:
+                return os.pread(fd, 4096, 0).decode()
+            except OSError:
+                # cgroup was removed, it may have been created again
+                self._close(path)
+        fd = self._fds[path] = os.open(path, os.O_RDONLY)
+        return os.pread(fd, 4096, 0).decode()
+
+    def limit(self, cgroup: Path, name: str) -> Optional[str]:
+        """
+        Effective limit of cgroup.
+
+        Parameters
+        -----------
+        cgroup : Path
+            cgroup directory
+        name : str
+            limit file, e.g. ``memory.max``
+
+        Returns
+        --------
+        str
+            contents of limit file of cgroup or its nearest limited ancestor
+        ``None``
+            no ancestor is limited
+
+        Raises
+        -------
+        OSError
+            cgroup or its controller does not exist
+        """
+        text = self.read(cgroup / name)
+        if not text.startswith('max'):
+            return text
+        for parent in cgroup.parents:
+            if CGROUP not in parent.parents:
+                break  # root cgroup is never limited
+            try:
+                text = self.read(parent / name)
+            except OSError:
+                continue
+            if not text.startswith('max'):
+                return text
+        return None
+
+    def delta(self, path: Path) -> Tuple[Dict[str, int], float]:
+        """
+        Increase of keyed counters since previous tick.
+
+        Parameters
+        -----------
+        path : Path
+            flat keyed interface file, e.g. ``cpu.stat``
+
+        Returns
+        --------
+        Tuple[Dict[str, int], float]
+            increase of each counter, seconds since previous sample
+            (``0``: no previous sample)
+
+        Raises
+        -------
+        OSError
+            cgroup or its controller does not exist
+        """
+        prev, curr = self._samples.get(path, (None, (-float('inf'), {})))
+        tick = current_tick()
+        if tick == 0 or tick != self._ticks.get(path):
+            self._ticks[path] = tick
+            prev, curr = curr, (monotonic(), parse_keyed(self.read(path)))
+            if prev[0] == -float('inf'):
+                prev = None
+            self._samples[path] = prev, curr
+        if prev is None:
+            return {}, 0.
+        return {
+            key: max(count - prev[1].get(key, 0), 0)
+            for key, count in curr[1].items()
+        }, curr[0] - prev[0]
+
+
+@lru_cache(maxsize=None)
+def cgroup_files() -> CgroupFiles:
+    """Shared kept-open interface files."""
+    return CgroupFiles()
@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Built-in modes for :py:attr:`psprudence.prudence.Prudence.alert_check`.
+
+A mode is selected in configuration by a mapping with the key ``mode``.
+Remaining keys are passed to the mode's constructor.
+
+.. code-block:: yaml
+
+   alert_check:
+     mode: debounce
+     breaches: 3
+     samples: 5
+     clear_warn: 70
+
+Each sensor gets its own instance that holds the sensor's state.
+"""
+
+from collections import deque
+from math import sqrt
+from typing import Any, Deque, Dict, Optional, Tuple, Type, Union
+
+from psprudence.clock import now
+from psprudence.errors import CheckModeError
+
+OK, PENDING, FIRING, RECOVERING = range(4)
+"""States of :class:`Debounce`."""
+
+STATE_NAMES = ('ok', 'pending', 'firing', 'recovering')
+"""Human-readable names of states."""
+
+
+class Debounce():
+    """
+    Hysteresis and debounce alert state machine.
+
+    ``OK → PENDING → FIRING → RECOVERING → OK``
+
+    - OK: a sample beyond ``min_warn`` makes it PENDING.
+    - PENDING: ``breaches`` of last ``samples`` beyond ``min_warn``
+      make it FIRING (alert). No sample beyond ``min_warn`` in last
+      ``samples`` makes it OK.
+    - FIRING: alerts again only when value escalates by ``warn_res``.
+      A sample within ``clear_warn`` makes it RECOVERING.
+    - RECOVERING: ``breaches`` of last ``samples`` within ``clear_warn``
+      make it OK. A sample beyond ``min_warn`` makes it FIRING again,
+      silently.
+
+    Direction is reversed if sensor is ``reverse``.
+
+    Parameters
+    -----------
+    breaches : int
+        samples (N of M) needed to change state [default: 3]
+    samples : int
+        sample window (M) [default: 5]
+    clear_warn : float, optional
+        value within which alert clears [default: sensor's ``min_warn``]
+    """
+
+    __slots__ = ('breaches', 'samples', 'clear_warn', 'state', 'bits',
+                 'next_warn')
+
+    def __init__(self,
+                 breaches: int = 3,
+                 samples: int = 5,
+                 clear_warn: Optional[float] = None):
+        if not 0 < int(breaches) <= int(samples):
+            raise CheckModeError(
+                f'debounce: 0 < breaches ({breaches}) <= samples ({samples})')
+        self.breaches = int(breaches)
+        self.samples = int(samples)
+        self.clear_warn = clear_warn
+        self.state: int = OK
+        """Current state."""
+
+        self.bits: int = 0
+        """Last samples, newest in lowest bit, 1 if counted towards change."""
+
+        self.next_warn: float = 0.
+        """Value beyond which a FIRING alert escalates."""
+
+    @property
+    def state_name(self) -> str:
+        """Human-readable current state."""
+        return STATE_NAMES[self.state]
+
+    def _count(self, counted: bool) -> int:
+        """Record a sample and count recorded samples in window."""
+        self.bits = ((self.bits << 1) | counted) & ((1 << self.samples) - 1)
+        return bin(self.bits).count('1')
+
+    def __call__(self, parent, val: Union[float, Any]) -> bool:
+        if not isinstance(val, (int, float)):
+            val = float(val)
+        direction = -1 if parent.reverse else 1
+        breach = direction * val > direction * parent.min_warn
+        clear_warn = (parent.min_warn
+                      if self.clear_warn is None else self.clear_warn)
+        clear = direction * val <= direction * clear_warn
+
+        if self.state == OK:
+            if breach:
+                self.state = PENDING
+                self.bits = 0
+            else:
+                return False
+        if self.state == PENDING:
+            count = self._count(breach)
+            if count >= self.breaches:
+                self.state = FIRING
+                self.next_warn = val + direction * parent.warn_res
+                return True
+            if count == 0:
+                self.state = OK
+            return False
+        if self.state == FIRING:
+            if clear:
+                # this sample counts towards recovery
+                self.state = RECOVERING
+                self.bits = 0
+            elif direction * val > direction * self.next_warn:
+                self.next_warn = val + direction * parent.warn_res
+                return True
+            else:
+                return False
+        # RECOVERING
+        if breach:
+            self.state = FIRING
+            return False
+        if self._count(clear) >= self.breaches:
+            self.state = OK
+            self.bits = 0
+        return False
+
+
+class Anomaly():
+    """
+    Alert on statistically unusual values.
+
+    Keeps a running mean and variance of the sensor's values, updated
+    with each sample in constant time and memory. A value whose z-score
+    (deviation from mean in standard deviations) exceeds ``threshold``
+    fires an alert, once the first ``warmup`` samples have been seen.
+    While unusual, alerts again only when value escalates by
+    ``warn_res``; clears when value is usual again.
+
+    Mean and variance are exponentially weighted by ``alpha`` so that
+    the baseline follows slow drifts; with ``alpha: 0``, all samples
+    weigh equally (cumulative z-score). Unusual values also enter the
+    baseline, so that a lasting shift of level becomes usual.
+
+    Only values beyond the mean in the sensor's direction are unusual:
+    above mean, below mean if sensor is ``reverse``. ``min_warn`` is
+    ignored.
+
+    Parameters
+    -----------
+    threshold : float
+        z-score beyond which a value is unusual [default: 3]
+    alpha : float
+        weight of latest sample in mean and variance [default: 0.05]
+    warmup : int
+        samples before any alert [default: 30]
+    min_std : float
+        floor of standard deviation, so that small changes of a nearly
+        constant sensor are not unusual [default: 0]
+    """
+
+    __slots__ = ('threshold', 'alpha', 'warmup', 'min_std', 'count', 'mean',
+                 'var', 'firing', 'next_warn')
+
+    def __init__(self,
+                 threshold: float = 3.,
+                 alpha: float = 0.05,
+                 warmup: int = 30,
+                 min_std: float = 0.):
+        if float(threshold) <= 0:
+            raise CheckModeError(f'anomaly: threshold ({threshold}) > 0')
+        if not 0 <= float(alpha) < 1:
+            raise CheckModeError(f'anomaly: 0 <= alpha ({alpha}) < 1')
+        self.threshold = float(threshold)
+        self.alpha = float(alpha)
+        self.warmup = int(warmup)
+        self.min_std = float(min_std)
+
+        self.count: int = 0
+        """Samples seen."""
+
+        self.mean: float = 0.
+        """Running mean."""
+
+        self.var: float = 0.
+        """Running variance."""
+
+        self.firing: bool = False
+        """Latest value was unusual."""
+
+        self.next_warn: float = 0.
+        """Value beyond which a firing alert escalates."""
+
+    def zscore(self, val: float) -> float:
+        """Deviation of value from mean in standard deviations."""
+        std = max(sqrt(self.var), self.min_std)
+        if std == 0:
+            return 0.
+        return (val - self.mean) / std
+
+    def update(self, val: float):
+        """Add sample to running mean and variance."""
+        self.count += 1
+        if self.count == 1:
+            self.mean, self.var = val, 0.
+            return
+        diff = val - self.mean
+        if self.alpha:
+            incr = self.alpha * diff
+            self.mean += incr
+            self.var = (1 - self.alpha) * (self.var + diff * incr)
+        else:  # Welford
+            self.mean += diff / self.count
+            self.var += (diff * (val - self.mean) - self.var) / self.count
+
+    def __call__(self, parent, val: Union[float, Any]) -> bool:
+        if not isinstance(val, (int, float)):
+            val = float(val)
+        direction = -1 if parent.reverse else 1
+        unusual = (self.count >= self.warmup
+                   and direction * self.zscore(val) > self.threshold)
+        self.update(val)
+        if not unusual:
+            self.firing = False
+            return False
+        if self.firing and direction * val <= direction * self.next_warn:
+            return False
+        self.firing = True
+        self.next_warn = val + direction * parent.warn_res
+        return True
+
+
+class Forecast():
+    """
+    Alert before value reaches ``min_warn``.
+
+    Fits a least-squares line through the values of the last ``window``
+    seconds and projects when it crosses ``min_warn``. If the projected
+    crossing is within ``horizon`` minutes, alerts with the expected
+    time; again each time it comes twice as close, down to a couple of
+    minutes. Values already beyond ``min_warn`` alert as with the
+    default check, escalating by ``warn_res``.
+
+    The fit is updated incrementally: each tick adds the new sample to
+    running sums and subtracts the samples that left the window. Times
+    are kept relative to the latest sample (sums are shifted in constant
+    time), so that the fit keeps its precision however long it runs.
+
+    Parameters
+    -----------
+    horizon : float
+        minutes within which a projected crossing alerts [default: 10]
+    window : float
+        seconds of history to fit [default: 300]
+    min_samples : int
+        samples in window needed for a forecast [default: 5]
+    """
+
+    __slots__ = ('horizon', 'window', 'min_samples', 'samples', 'origin',
+                 'sums', 'warned_eta', 'next_warn')
+
+    def __init__(self,
+                 horizon: float = 10.,
+                 window: float = 300.,
+                 min_samples: int = 5):
+        if float(horizon) <= 0 or float(window) <= 0:
+            raise CheckModeError(
+                f'forecast: horizon ({horizon}) and window ({window}) > 0')
+        if int(min_samples) < 2:
+            raise CheckModeError(f'forecast: min_samples ({min_samples}) >= 2')
+        self.horizon = float(horizon) * 60
+        self.window = float(window)
+        self.min_samples = int(min_samples)
+
+        self.samples: Deque[Tuple[float, float]] = deque()
+        """(stamp, value) in window, to drop them from sums."""
+
+        self.origin: float = 0.
+        """Stamp of latest sample, origin of times in sums."""
+
+        self.sums = [0., 0., 0., 0.]
+        """Σt, Σt², Σx, Σtx with times relative to :attr:`origin`."""
+
+        self.warned_eta: Optional[float] = None
+        """Seconds to crossing in latest forecast alert."""
+
+        self.next_warn: Optional[float] = None
+        """Value beyond which an alert beyond ``min_warn`` escalates."""
+
+    def update(self, val: float, stamp: float):
+        """Add sample, drop samples older than window."""
+        shift = stamp - self.origin
+        count = len(self.samples)
+        sum_t, sum_tt, sum_x, sum_tx = self.sums
+        # move origin to the new sample
+        sum_tt += shift * (count * shift - 2 * sum_t)
+        sum_tx -= shift * sum_x
+        sum_t -= count * shift
+        self.origin = stamp
+        self.samples.append((stamp, val))
+        sum_x += val
+        while self.samples[0][0] < stamp - self.window:
+            old_stamp, old_val = self.samples.popleft()
+            old_t = old_stamp - stamp
+            sum_t -= old_t
+            sum_tt -= old_t * old_t
+            sum_x -= old_val
+            sum_tx -= old_t * old_val
+        self.sums = [sum_t, sum_tt, sum_x, sum_tx]
+
+    def trend(self) -> Optional[Tuple[float, float]]:
+        """
+        Fitted line.
+
+        Returns
+        --------
+        Tuple[float, float]
+            value at latest sample, change per second
+        ``None``
+            too few samples to fit
+        """
+        count = len(self.samples)
+        if count < self.min_samples:
+            return None
+        sum_t, sum_tt, sum_x, sum_tx = self.sums
+        spread = count * sum_tt - sum_t * sum_t
+        if spread <= 0:
+            return None
+        slope = (count * sum_tx - sum_t * sum_x) / spread
+        return (sum_x - slope * sum_t) / count, slope
+
+    def eta(self, target: float) -> Optional[float]:
+        """Seconds until trend reaches target, ``None`` if it does not."""
+        trend = self.trend()
+        if trend is None or trend[1] == 0:
+            return None
+        eta = (target - trend[0]) / trend[1]
+        return eta if eta > 0 else None
+
+    def __call__(self, parent, val: Union[float, Any]) -> Union[bool, str]:
+        if not isinstance(val, (int, float)):
+            val = float(val)
+        self.update(val, now())
+        direction = -1 if parent.reverse else 1
+        if direction * val > direction * parent.min_warn:
+            self.warned_eta = None
+            if (self.next_warn is not None
+                    and direction * val <= direction * self.next_warn):
+                return False
+            self.next_warn = val + direction * parent.warn_res
+            return True
+        self.next_warn = None
+        eta = self.eta(parent.min_warn)
+        if eta is None or eta > self.horizon:
+            self.warned_eta = None
+            return False
+        if self.warned_eta is not None and (eta > self.warned_eta / 2
+                                            or self.warned_eta < 120):
+            return False
+        self.warned_eta = eta
+        return (f'reaches {parent.min_warn}{parent.units} '
+                f'in {eta / 60:.0f} min')
+
+
+ALERT_CHECKS: Dict[str, Type] = {
+    'debounce': Debounce,
+    'anomaly': Anomaly,
+    'forecast': Forecast
+}
+"""Built-in alert_check modes."""
+
+
+def build_check(config: Dict[str, Any], util: str = 'UNKNOWN'):
+    """
+    Build an alert_check mode from configuration.
+
+    Parameters
+    -----------
+    config : Dict[str, Any]
+        ``mode`` and its parameters
+    util : str
+        name object that uses this mode (used to elaborate debug)
+
+    Returns
+    --------
+    Callable[[Any, Union[float, Any]], bool]
+        alert_check callable with its own state
+
+    Raises
+    -------
+    CheckModeError
+    """
+    params = dict(config)
+    mode = params.pop('mode', None)
+    if mode not in ALERT_CHECKS:
+        raise CheckModeError(f'{util}: unknown alert_check mode {mode}. ' +
+                             f'Choose from {list(ALERT_CHECKS)}')
+    try:
+        return ALERT_CHECKS[mode](**params)
+    except TypeError as err:
+        raise CheckModeError(f'{util}: {err}') from err
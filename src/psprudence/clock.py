@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Clock for time-dependent alert logic.
+
+Alert logic that depends on time (history windows, trends) reads
+:func:`now` instead of the system clock, so that recorded traces may be
+replayed with a simulated clock.
+"""
+
+from time import monotonic
+from typing import Callable
+
+_SOURCE = [monotonic]
+
+
+def now() -> float:
+    """Current time in seconds from the active clock source."""
+    return _SOURCE[0]()
+
+
+def use(source: Callable[[], float] = monotonic):
+    """
+    Set clock source.
+
+    Parameters
+    -----------
+    source : Callable[[], float]
+        returns current time in seconds [default: :func:`time.monotonic`]
+    """
+    _SOURCE[0] = source
+
+
+class SimulatedClock():
+    """
+    Clock that moves only when set.
+
+    Parameters
+    -----------
+    stamp : float
+        initial time in seconds
+    """
+
+    def __init__(self, stamp: float = 0.):
+        self.stamp = stamp
+
+    def __call__(self) -> float:
+        return self.stamp
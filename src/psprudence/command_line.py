@@ -49,6 +49,34 @@ def _cli() -> ArgumentParser:
                           help="Init PSPrudence: autostart and services",
                           parents=[(init_parser())],
                           add_help=False)
+    check = subparsers.add_parser(
+        name='check',
+        help='Validate configuration: build all handles, show build times')
+    check.add_argument('-c',
+                       '--config',
+                       dest='custom',
+                       type=Path,
+                       default=None,
+                       help='Custom configuration file path')
+    check.set_defaults(call='check')
+    replay = subparsers.add_parser(
+        name='replay',
+        help='Replay recorded traces, report alerts that would have fired')
+    replay.add_argument('traces',
+                        type=Path,
+                        nargs='+',
+                        help='Recorded traces (binary or CSV)')
+    replay.add_argument('-c',
+                        '--config',
+                        dest='custom',
+                        type=Path,
+                        default=None,
+                        help='Custom configuration file path')
+    replay.add_argument('-q',
+                        '--quiet',
+                        action='store_true',
+                        help='Print only summary')
+    replay.set_defaults(call='replay')
     parser.add_argument('--debug',
                         action='store_true',
                         help='Print debugging output')
@@ -69,6 +97,15 @@ def _cli() -> ArgumentParser:
                         type=Path,
                         default=None,
                         help='Custom configuration file path')
+    parser.add_argument('--record',
+                        type=Path,
+                        default=None,
+                        metavar='PATH',
+                        help='Record values of every tick to binary trace')
+    parser.add_argument('--bar',
+                        choices=('i3bar', 'waybar'),
+                        default=None,
+                        help='Stream status to stdout for a status bar')
     parser.add_argument(
         '--version',
         action='version',
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Cache of merged configuration.
+
+Merged configuration is stored in :mod:`marshal` format under
+``${XDG_CACHE_HOME:-${HOME}/.cache}/psprudence``, keyed by path,
+modification time and size of every candidate configuration file.
+When no candidate file has been created, modified or removed since,
+configuration is loaded from the cache without parsing any YAML.
+"""
+
+import marshal
+import os
+from hashlib import sha1
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from xdgpspconf import CacheDisc
+
+from psprudence.__about__ import __version__
+
+CACHE_DISC = CacheDisc('psprudence')
+
+Key = Tuple[Any, ...]
+
+
+def cache_key(sources: Sequence[Path]) -> Key:
+    """
+    Key that changes when any source changes.
+
+    Parameters
+    -----------
+    sources : Sequence[Path]
+        candidate configuration files, existing or not
+
+    Returns
+    --------
+    Key
+        versions of formats and (path, mtime, size) of every source
+    """
+    stats: List[Tuple[str, int, int]] = []
+    for source in sources:
+        try:
+            stat = os.stat(source)
+            stats.append((str(source), stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            stats.append((str(source), -1, -1))
+    return (__version__, marshal.version, tuple(stats))
+
+
+def cache_path(custom: Optional[Path] = None) -> Optional[Path]:
+    """
+    Path to cache of configuration.
+
+    Parameters
+    -----------
+    custom : Path, optional
+        custom configuration, each has its own cache
+
+    Returns
+    --------
+    Path
+        cache file
+    ``None``
+        no writable cache location
+    """
+    try:
+        cache_dir = CACHE_DISC.get_loc(permargs={'mode': 'w'})[0]
+    except (IndexError, OSError):
+        return None
+    tag = sha1(str(custom).encode()).hexdigest()[:12]
+    return cache_dir / f'config-{tag}.marshal'
+
+
+def load(sources: Sequence[Path],
+         custom: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    """
+    Load cached configuration.
+
+    Parameters
+    -----------
+    sources : Sequence[Path]
+        candidate configuration files
+    custom : Path, optional
+        custom configuration
+
+    Returns
+    --------
+    Dict[str, Any]
+        cached configuration
+    ``None``
+        no cache or cache is stale
+    """
+    path = cache_path(custom)
+    if path is None:
+        return None
+    try:
+        key, config = marshal.loads(path.read_bytes())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if key != cache_key(sources):
+        return None
+    return config
+
+
+def store(sources: Sequence[Path],
+          config: Dict[str, Any],
+          custom: Optional[Path] = None):
+    """
+    Store configuration in cache, silently skip if impossible.
+
+    Parameters
+    -----------
+    sources : Sequence[Path]
+        candidate configuration files that were read
+    config : Dict[str, Any]
+        merged configuration
+    custom : Path, optional
+        custom configuration
+    """
+    path = cache_path(custom)
+    if path is None:
+        return
+    try:
+        blob = marshal.dumps((cache_key(sources), config))
+    except ValueError:
+        return  # configuration holds types that marshal can't handle
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp = path.with_suffix(f'.{os.getpid()}')
+        temp.write_bytes(blob)
+        os.replace(temp, path)
+    except OSError:
+        pass
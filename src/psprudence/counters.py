@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Cumulative counters of block devices and network interfaces, mounts.
+
+``/proc/diskstats`` and ``/proc/net/dev`` count operations, sectors,
+bytes and errors since boot. :class:`CounterTable` keeps the file open,
+parses it once per tick into a preallocated array (``width`` counters
+per device) and keeps the previous sample in a second array, which
+sensors diff. Arrays are reallocated only when devices appear or vanish.
+
+Devices and mount points are selected by comma-separated glob patterns.
+Patterns prefixed by ``!`` exclude, e.g. ``*,!lo`` selects every
+network interface except loopback. Block devices may also be selected
+by alias ``disks``: whole physical disks, without partitions, loop,
+device-mapper or RAM devices.
+
+:class:`MountTable` re-reads ``/proc/self/mounts`` only after the kernel
+flags a change of mounts.
+"""
+
+import os
+import re
+import select
+from array import array
+from fnmatch import fnmatchcase
+from functools import lru_cache
+from pathlib import Path
+from time import monotonic
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from psprudence.events import current_tick
+
+DISKSTATS = Path('/proc/diskstats')
+"""Linux block device counters."""
+
+NETDEV = Path('/proc/net/dev')
+"""Linux network interface counters."""
+
+MOUNTS = Path('/proc/self/mounts')
+"""Linux mount table of this process's namespace."""
+
+SYS_BLOCK = Path('/sys/block')
+"""Linux block devices (without partitions)."""
+
+SECTOR = 512
+"""Bytes per ``/proc/diskstats`` sector, irrespective of the device."""
+
+DISK_FIELDS = ('reads', 'read_sectors', 'read_ms', 'writes',
+               'write_sectors', 'write_ms', 'io_ms')
+"""Counters of each block device, in :attr:`CounterTable.curr`."""
+
+NET_FIELDS = ('rx_bytes', 'rx_packets', 'rx_errors', 'tx_bytes',
+              'tx_packets', 'tx_errors')
+"""Counters of each network interface (errors include drops)."""
+
+Row = Tuple[str, Sequence[int]]
+
+
+def _read_all(fd: int) -> str:
+    """Read whole (proc) file from its beginning."""
+    chunks = []
+    offset = 0
+    while True:
+        chunk = os.pread(fd, 65536, offset)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        offset += len(chunk)
+    return b''.join(chunks).decode(errors='replace')
+
+
+def parse_diskstats(text: str) -> List[Row]:
+    """Counters of :data:`DISK_FIELDS` of each block device."""
+    rows = []
+    for line in text.splitlines():
+        fields = line.split()
+        if len(fields) < 13:
+            continue
+        rows.append((fields[2], [int(fields[idx]) for idx in
+                                 (3, 5, 6, 7, 9, 10, 12)]))
+    return rows
+
+
+def parse_netdev(text: str) -> List[Row]:
+    """Counters of :data:`NET_FIELDS` of each network interface."""
+    rows = []
+    for line in text.splitlines():
+        name, sep, counts = line.partition(':')
+        if not sep:
+            continue  # header
+        fields = [int(field) for field in counts.split()]
+        rows.append((name.strip(), (fields[0], fields[1],
+                                    fields[2] + fields[3], fields[8],
+                                    fields[9], fields[10] + fields[11])))
+    return rows
+
+
+def whole_disks(names: Sequence[str]) -> List[str]:
+    """Block devices backed by hardware, without their partitions."""
+    return [name for name in names if (SYS_BLOCK / name / 'device').exists()]
+
+
+ALIASES: Dict[str, Callable[[Sequence[str]], List[str]]] = {
+    'disks': whole_disks
+}
+"""Named selections of devices."""
+
+
+def select_names(names: Sequence[str], patterns: str) -> Tuple[int, ...]:
+    """
+    Select names by comma-separated glob patterns.
+
+    Parameters
+    -----------
+    names : Sequence[str]
+        device names or mount points
+    patterns : str
+        patterns (or aliases); patterns prefixed by ``!`` exclude
+
+    Returns
+    --------
+    Tuple[int, ...]
+        indices of selected names
+    """
+    include: List[str] = []
+    exclude: List[str] = []
+    for pattern in patterns.split(','):
+        pattern = pattern.strip()
+        if pattern.startswith('!'):
+            exclude.append(pattern[1:])
+        elif pattern:
+            include.append(pattern)
+    aliased = set()
+    for pattern in include:
+        if pattern in ALIASES:
+            aliased.update(ALIASES[pattern](names))
+    include = [pattern for pattern in include if pattern not in ALIASES]
+    if not (include or aliased):
+        include = ['*']
+    return tuple(
+        idx for idx, name in enumerate(names)
+        if (name in aliased or any(
+            fnmatchcase(name, pattern) for pattern in include)) and not any(
+                fnmatchcase(name, pattern) for pattern in exclude))
+
+
+class CounterTable():
+    """
+    Cumulative counters of devices, sampled once per tick.
+
+    Parameters
+    -----------
+    path : Path
+        counters file
+    parse : Callable[[str], List[Row]]
+        parses file contents into (device, counters)
+    width : int
+        counters per device
+    """
+
+    def __init__(self,
+                 path: Path,
+                 parse: Callable[[str], List[Row]],
+                 width: int):
+        self.path = path
+        self.parse = parse
+        self.width = width
+
+        self.names: Tuple[str, ...] = ()
+        """Devices, in the order of their counters."""
+
+        self.prev = array('d')
+        """Previous sample: ``width`` counters of each device."""
+
+        self.curr = array('d')
+        """Current sample: ``width`` counters of each device."""
+
+        self.elapsed = 0.
+        """Seconds between samples, ``0``: no valid previous sample."""
+
+        self._fd: Optional[int] = None
+        self._stamp = -float('inf')
+        self._tick = 0
+        self._selected: Dict[str, Tuple[int, ...]] = {}
+
+    def _resize(self, names: Tuple[str, ...]):
+        """Reallocate arrays for a changed set of devices."""
+        self.names = names
+        self.prev = array('d', bytes(8 * self.width * len(names)))
+        self.curr = array('d', self.prev)
+        self._selected.clear()
+
+    def sample(self) -> float:
+        """
+        Sample counters, unless already sampled in this tick.
+
+        Sensors of the same tick (see
+        :func:`psprudence.events.current_tick`) share a sample.
+
+        Returns
+        --------
+        float
+            seconds between previous and current sample,
+            ``0`` if there is no valid previous sample
+
+        Raises
+        -------
+        OSError
+            counters file is unavailable
+        """
+        tick = current_tick()
+        if tick and tick == self._tick:
+            return self.elapsed
+        now = monotonic()
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDONLY)
+        rows = self.parse(_read_all(self._fd))
+        names = tuple(name for name, _ in rows)
+        if names == self.names:
+            self.prev, self.curr = self.curr, self.prev
+            self.elapsed = now - self._stamp
+        else:
+            self._resize(names)
+            self.elapsed = 0.
+        curr = self.curr
+        base = 0
+        for _, counts in rows:
+            for count in counts:
+                curr[base] = count
+                base += 1
+        self._stamp = now
+        self._tick = tick
+        return self.elapsed
+
+    def select(self, patterns: str) -> Tuple[int, ...]:
+        """Indices of devices selected by ``patterns``, cached."""
+        selected = self._selected.get(patterns)
+        if selected is None:
+            selected = self._selected[patterns] = select_names(
+                self.names, patterns)
+        return selected
+
+    def delta(self, device: int, field: int) -> float:
+        """Increase of a counter between samples (``0`` if it was reset)."""
+        idx = device * self.width + field
+        return max(self.curr[idx] - self.prev[idx], 0.)
+
+
+class MountTable():
+    """
+    Mount points, re-read only when mounts change.
+
+    Parameters
+    -----------
+    path : Path
+        mount table
+    """
+
+    def __init__(self, path: Path = MOUNTS):
+        self.path = path
+        self.points: Tuple[str, ...] = ()
+        """Mount points."""
+
+        self._fd = os.open(path, os.O_RDONLY)
+        self._poll = select.poll()
+        self._poll.register(self._fd, select.POLLPRI)
+        self._selected: Dict[str, Tuple[str, ...]] = {}
+        self.read()
+
+    def read(self):
+        """Read mount points, dropping cached selections."""
+        points: Dict[str, None] = {}
+        for line in _read_all(self._fd).splitlines():
+            fields = line.split()
+            if len(fields) > 1:
+                # spaces etc. are octal-escaped
+                points[re.sub(r'\\([0-7]{3})',
+                              lambda match: chr(int(match[1], 8)),
+                              fields[1])] = None
+        self.points = tuple(points)
+        self._selected.clear()
+
+    def select(self, patterns: str) -> Tuple[str, ...]:
+        """
+        Mount points selected by ``patterns``.
+
+        The mount table is re-read first if the kernel flagged a change.
+        """
+        if any(event & select.POLLPRI for _, event in self._poll.poll(0)):
+            self.read()
+        selected = self._selected.get(patterns)
+        if selected is None:
+            selected = self._selected[patterns] = tuple(
+                self.points[idx]
+                for idx in select_names(self.points, patterns))
+        return selected
+
+
+@lru_cache(maxsize=None)
+def disk_stats() -> CounterTable:
+    """Shared block device counters."""
+    return CounterTable(DISKSTATS, parse_diskstats, len(DISK_FIELDS))
+
+
+@lru_cache(maxsize=None)
+def net_stats() -> CounterTable:
+    """Shared network interface counters."""
+    return CounterTable(NETDEV, parse_netdev, len(NET_FIELDS))
+
+
+@lru_cache(maxsize=None)
+def mount_table() -> MountTable:
+    """Shared mount table."""
+    return MountTable()
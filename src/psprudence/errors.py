@@ -53,3 +53,15 @@ class CommandError(PSPrudenceError):
 
 class CMDValueError(ValueError, PSPrudenceError):
     """Bad command value."""
+
+
+class ExpressionError(ValueError, PSPrudenceError):
+    """Bad threshold expression."""
+
+
+class CheckModeError(ValueError, PSPrudenceError):
+    """Bad alert_check mode configuration."""
+
+
+class WorkerError(RuntimeError, PSPrudenceError):
+    """Isolated probe worker failed."""
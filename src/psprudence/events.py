@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Wake the monitoring loop from event sources.
+
+Event-driven sources (e.g. kernel uevents) run in background threads.
+When they observe an actionable change, they call :func:`wake`, so that
+the monitoring loop runs the next tick immediately instead of waiting
+for the rest of its interval.
+
+A source that concerns only some sensors wakes with its own key.
+Sensors subscribe to a key when their probe calls :func:`subscribe`
+while they tick (see :func:`running`). Such a wake runs only the
+subscribed sensors; the periodic schedule of other sensors is kept.
+
+Ticks are numbered by the monitoring loop (:func:`next_tick`), so that
+probes and counters shared by several sensors are read once per tick
+(:func:`current_tick`), however short or long the tick.
+"""
+
+from threading import Event, Lock
+from typing import Dict, Hashable, List, Optional, Set
+
+TICK = Event()
+"""Set to run the next tick immediately."""
+
+_TICKS: List[int] = [0]
+
+_RUNNING: List[Optional[int]] = [None]
+
+_SUBSCRIBERS: Dict[Hashable, Set[int]] = {}
+
+_PENDING: Set[int] = set()
+
+_FULL: List[bool] = [False]
+
+_LOCK = Lock()
+
+
+def next_tick() -> int:
+    """
+    Start the next tick of monitoring loop.
+
+    Returns
+    --------
+    int
+        number of the started tick (from 1)
+    """
+    _TICKS[0] += 1
+    return _TICKS[0]
+
+
+def current_tick() -> int:
+    """
+    Number of the running tick.
+
+    Returns
+    --------
+    int
+        tick number, ``0`` outside the monitoring loop: nothing is
+        shared, every call reads afresh
+    """
+    return _TICKS[0]
+
+
+def running(sensor: Optional[int]):
+    """
+    Mark sensor whose probe is being called.
+
+    Parameters
+    -----------
+    sensor : int, optional
+        sensor id, ``None`` after the call
+    """
+    _RUNNING[0] = sensor
+
+
+def subscribe(source: Hashable):
+    """
+    Subscribe the running sensor to wakes by ``source``.
+
+    Parameters
+    -----------
+    source : Hashable
+        key of event source
+    """
+    sensor = _RUNNING[0]
+    if sensor is not None:
+        with _LOCK:
+            _SUBSCRIBERS.setdefault(source, set()).add(sensor)
+
+
+def wake(source: Optional[Hashable] = None):
+    """
+    Wake monitoring loop immediately.
+
+    Parameters
+    -----------
+    source : Hashable, optional
+        key of event source: run only its subscribers.
+        [default: run a full tick]
+    """
+    with _LOCK:
+        subscribers = _SUBSCRIBERS.get(source) if source is not None else None
+        if subscribers:
+            _PENDING.update(subscribers)
+        else:
+            _FULL[0] = True
+    TICK.set()
+
+
+def woken() -> Optional[Set[int]]:
+    """
+    Sensors to run for the wakes since the previous check.
+
+    Returns
+    --------
+    Set[int]
+        ids of sensors subscribed to the sources that woke the loop
+    ``None``
+        a full tick was requested
+    """
+    with _LOCK:
+        full = _FULL[0]
+        pending = set(_PENDING)
+        _FULL[0] = False
+        _PENDING.clear()
+    return None if full else pending
+
+
+def wait(timeout: float) -> bool:
+    """
+    Wait for the next tick.
+
+    Parameters
+    -----------
+    timeout : float
+        seconds to wait, unless woken by an event
+
+    Returns
+    --------
+    bool
+        ``True`` if woken by an event before timeout
+    """
+    woken = TICK.wait(timeout)
+    TICK.clear()
+    return woken
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Threshold expressions for :py:attr:`psprudence.prudence.Prudence.alert_check`.
+
+Expressions are declared in configuration as ``ex: <expression>``, e.g.
+
+.. code-block:: yaml
+
+   alert_check: 'ex: val > 90 and rate(30) > 2'
+
+An expression is a safe subset of python expressions:
+
+- numbers, ``True``, ``False``
+- arithmetic ``+ - * / // % **``, comparisons, ``and``, ``or``, ``not``,
+  ``x if condition else y``; exponents of ``**`` must be numbers up to
+  :data:`MAX_EXPONENT`
+- names:
+    - ``val``: current value
+    - ``min_warn``, ``warn_res``: sensor's configuration
+- functions: ``abs``, ``min``, ``max`` and history over last ``secs``:
+    - ``rate(secs)``: change per second
+    - ``mean(secs)``: average value
+    - ``low(secs)``, ``high(secs)``: lowest, highest value
+    - ``ago(secs)``: value ``secs`` seconds ago (oldest available)
+
+History windows (``secs``) must be numbers, so that only as much history
+as the longest window is retained.
+
+Each expression is parsed, validated and compiled to a function once.
+No parsing happens on ticks. An arithmetic error during evaluation
+(e.g. division by the zero spread of a flat window) does not alert.
+"""
+
+import ast
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple, Union
+
+from psprudence.clock import now
+from psprudence.errors import ExpressionError
+
+NAMES = ('val', 'min_warn', 'warn_res')
+"""Names available in expressions."""
+
+FUNCTIONS: Dict[str, Callable] = {'abs': abs, 'min': min, 'max': max}
+"""Stateless functions available in expressions."""
+
+ARITY: Dict[str, Tuple[int, float]] = {
+    'abs': (1, 1),
+    'min': (2, float('inf')),
+    'max': (2, float('inf'))
+}
+"""Least and most positional arguments of :data:`FUNCTIONS`."""
+
+MAX_EXPONENT = 10
+"""Largest magnitude of a ``**`` exponent."""
+
+WINDOW_FUNCTIONS = ('rate', 'mean', 'low', 'high', 'ago')
+"""Functions of history over a window of seconds."""
+
+_NODES = (ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not,
+          ast.USub, ast.UAdd, ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div,
+          ast.FloorDiv, ast.Mod, ast.Pow, ast.Compare, ast.Eq, ast.NotEq,
+          ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.IfExp, ast.Call, ast.Name,
+          ast.Load, ast.Constant)
+"""Permitted syntax."""
+
+
+class History():
+    """
+    Values of a sensor over the last ``span`` seconds.
+
+    Parameters
+    -----------
+    span : float
+        seconds of history to retain
+    """
+
+    def __init__(self, span: float = 0.):
+        self.span = span
+        self.points: Deque[Tuple[float, float]] = deque()
+
+    def append(self, val: float, stamp: float):
+        """Record value, forget values older than span."""
+        self.points.append((stamp, val))
+        horizon = stamp - self.span
+        while self.points[0][0] < horizon:
+            self.points.popleft()
+
+    def window(self, secs: float) -> Tuple[Tuple[float, float], ...]:
+        """(stamp, value) points in last ``secs``, oldest first."""
+        horizon = self.points[-1][0] - secs
+        return tuple(point for point in self.points if point[0] >= horizon)
+
+    def rate(self, secs: float) -> float:
+        """Change per second over last ``secs``."""
+        window = self.window(secs)
+        (stamp_0, val_0), (stamp_1, val_1) = window[0], window[-1]
+        if stamp_1 <= stamp_0:
+            return 0.
+        return (val_1 - val_0) / (stamp_1 - stamp_0)
+
+    def mean(self, secs: float) -> float:
+        """Average value over last ``secs``."""
+        window = self.window(secs)
+        return sum(val for _, val in window) / len(window)
+
+    def low(self, secs: float) -> float:
+        """Lowest value over last ``secs``."""
+        return min(val for _, val in self.window(secs))
+
+    def high(self, secs: float) -> float:
+        """Highest value over last ``secs``."""
+        return max(val for _, val in self.window(secs))
+
+    def ago(self, secs: float) -> float:
+        """Value ``secs`` ago, or oldest value retained."""
+        return self.window(secs)[0][1]
+
+
+def _number(node: ast.AST) -> Optional[float]:
+    """Value of a (signed) numeric constant, ``None`` if not a constant."""
+    sign = 1
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op,
+                                                    (ast.USub, ast.UAdd)):
+        sign = -1 if isinstance(node.op, ast.USub) else 1
+        node = node.operand
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return sign * node.value
+    return None
+
+
+def _validate(tree: ast.Expression) -> float:
+    """
+    Check that expression uses only permitted syntax.
+
+    Returns
+    --------
+    float
+        longest history window (seconds) used by the expression
+
+    Raises
+    -------
+    ExpressionError
+    """
+    span = 0.
+    # function names may appear only as called functions
+    callees = {
+        id(node.func)
+        for node in ast.walk(tree) if isinstance(node, ast.Call)
+    }
+    for node in ast.walk(tree):
+        if not isinstance(node, _NODES):
+            raise ExpressionError(
+                f'{type(node).__name__} is not permitted in expressions')
+        if isinstance(node, ast.Constant):
+            if not isinstance(node.value, (int, float)):
+                raise ExpressionError(f'Bad constant: {node.value!r}')
+        elif isinstance(node, ast.Name):
+            if id(node) in callees:
+                if node.id not in (*FUNCTIONS, *WINDOW_FUNCTIONS):
+                    raise ExpressionError(f'Unknown function: {node.id}')
+            elif node.id in (*FUNCTIONS, *WINDOW_FUNCTIONS):
+                raise ExpressionError(f'{node.id} must be called')
+            elif node.id not in NAMES:
+                raise ExpressionError(f'Unknown name: {node.id}')
+        elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow):
+            exponent = _number(node.right)
+            if exponent is None or abs(exponent) > MAX_EXPONENT:
+                raise ExpressionError(
+                    f'Exponents must be numbers up to {MAX_EXPONENT}')
+            if isinstance(node.left, ast.BinOp) and isinstance(
+                    node.left.op, ast.Pow):
+                raise ExpressionError('Powers of powers are not permitted')
+        elif isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.keywords:
+                raise ExpressionError('Only positional calls of '
+                                      'permitted functions are allowed')
+            if node.func.id in ARITY:
+                least, most = ARITY[node.func.id]
+                if not least <= len(node.args) <= most:
+                    raise ExpressionError(
+                        f'{node.func.id}() takes {least}' +
+                        ('' if most == least else ' or more') +
+                        f' argument(s), got {len(node.args)}')
+            elif node.func.id in WINDOW_FUNCTIONS:
+                if len(node.args) != 1 or not isinstance(
+                        node.args[0], ast.Constant):
+                    raise ExpressionError(
+                        f'{node.func.id}(secs) needs a number of seconds')
+                span = max(span, float(node.args[0].value))
+    return span
+
+
+def compile_expression(
+        source: str,
+        util: str = 'UNKNOWN') -> Callable[[Any, Union[float, Any]], bool]:
+    """
+    Compile threshold expression to an alert_check callable.
+
+    Parameters
+    -----------
+    source : str
+        expression
+    util : str
+        name object that uses this expression (used to elaborate debug)
+
+    Returns
+    --------
+    Callable[[Any, Union[float, Any]], bool]
+        alert_check callable, records history of values on each call
+
+    Raises
+    -------
+    ExpressionError
+    """
+    try:
+        tree = ast.parse(source.strip(), mode='eval')
+    except SyntaxError as err:
+        raise ExpressionError(f'{util}: {err}') from err
+    try:
+        span = _validate(tree)
+    except ExpressionError as err:
+        raise ExpressionError(f'{util}: {err}') from err
+
+    history = History(span)
+    namespace: Dict[str, Any] = {'__builtins__': {}, **FUNCTIONS}
+    for name in WINDOW_FUNCTIONS:
+        namespace[name] = getattr(history, name)
+
+    # expression becomes the body of a function of NAMES
+    func_tree = ast.Expression(body=ast.Lambda(
+        args=ast.arguments(posonlyargs=[],
+                           args=[ast.arg(arg=name) for name in NAMES],
+                           kwonlyargs=[],
+                           kw_defaults=[],
+                           defaults=[]),
+        body=tree.body))
+    ast.fix_missing_locations(func_tree)
+    check = eval(compile(func_tree, f'<{util}>', 'eval'), namespace)
+
+    def excheck(parent, val: Union[float, Any]) -> bool:
+        if not isinstance(val, (int, float)):
+            val = float(val)
+        history.append(val, now())
+        try:
+            return bool(check(val, parent.min_warn, parent.warn_res))
+        except ArithmeticError:
+            return False
+
+    excheck.__doc__ = f'Threshold expression: {util}\n\n{source}'
+    return excheck
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Index of hardware-monitor (hwmon) sensors.
+
+``/sys/class/hwmon`` is scanned once and each input file is indexed by a
+label ``<chip>/<label>`` (lower case), e.g.:
+
+- ``coretemp/package id 0``
+- ``coretemp/core 3``
+- ``k10temp/tctl``
+- ``nvme/composite``
+- ``acpitz/temp1``
+- ``thinkpad/fan1``
+
+Labels may be selected with glob patterns. A pattern without ``/``
+matches either the chip or the label, so ``nvme`` selects every
+``nvme/*`` input and ``core *`` selects every ``*/core *`` input.
+``package`` selects the CPU package sensor of common chips.
+
+Selected input files are kept open and only they are read on each tick.
+The index is rebuilt when hwmon devices are (un)plugged or reading fails.
+"""
+
+import os
+from fnmatch import fnmatchcase
+from functools import lru_cache
+from pathlib import Path
+from time import monotonic
+from typing import Dict, List, Tuple
+
+HWMON = Path('/sys/class/hwmon')
+"""Linux hardware monitor class."""
+
+ALIASES: Dict[str, Tuple[str, ...]] = {
+    'package': ('coretemp/package id *', 'k10temp/tctl', 'k10temp/tdie',
+                'zenpower/tdie', 'cpu_thermal/*', 'soc_thermal/*',
+                'cpu-thermal/*')
+}
+"""Common labels: first pattern that selects any input is used."""
+
+SCALE: Dict[str, float] = {'temp': 1e-3, 'fan': 1.}
+"""Conversion from raw sysfs value: millidegree Celsius, RPM."""
+
+
+class HwmonIndex():
+    """
+    Index of hwmon labels to sysfs input files.
+
+    Parameters
+    -----------
+    root : Path
+        hwmon class directory
+    recheck : float
+        seconds between checks for (un)plugged devices
+    """
+
+    def __init__(self, root: Path = HWMON, recheck: float = 60.):
+        self.root = root
+        self.recheck = recheck
+        self.inputs: Dict[str, Dict[str, Path]] = {kind: {} for kind in SCALE}
+        """Input files by kind, by label."""
+
+        self._devices: List[str] = []
+        self._checked = 0.
+        self._selected: Dict[Tuple[str, str], Tuple[int, ...]] = {}
+        self.build()
+
+    def build(self):
+        """(Re)build index, closing previously selected files."""
+        self.close()
+        self.inputs = {kind: {} for kind in SCALE}
+        self._devices = self._list_devices()
+        self._checked = monotonic()
+        for device in self._devices:
+            dev_dir = self.root / device
+            try:
+                chip = (dev_dir / 'name').read_text().strip().lower()
+            except OSError:
+                continue
+            for kind in SCALE:
+                for in_file in dev_dir.glob(f'{kind}*_input'):
+                    stem = in_file.name[:-len('_input')]
+                    try:
+                        label = (dev_dir / f'{stem}_label').read_text()
+                    except OSError:
+                        label = stem
+                    key = f'{chip}/{label.strip().lower()}'
+                    # same chip may be registered multiple times
+                    self.inputs[kind].setdefault(key, in_file)
+
+    def close(self):
+        """Close all selected input files."""
+        for fds in self._selected.values():
+            for fd in fds:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._selected.clear()
+
+    def _list_devices(self) -> List[str]:
+        try:
+            return sorted(os.listdir(self.root))
+        except OSError:
+            return []
+
+    def labels(self, pattern: str = '*', kind: str = 'temp') -> List[str]:
+        """
+        Labels selected by pattern.
+
+        Parameters
+        -----------
+        pattern : str
+            glob pattern or alias
+        kind : {temp, fan}
+            kind of input
+
+        Returns
+        --------
+        List[str]
+            selected labels
+        """
+        pattern = pattern.strip().lower()
+        keys = self.inputs[kind].keys()
+        for alias in ALIASES.get(pattern, ()):
+            selected = [key for key in keys if fnmatchcase(key, alias)]
+            if selected:
+                return selected
+        if '/' in pattern:
+            return [key for key in keys if fnmatchcase(key, pattern)]
+        return [
+            key for key in keys if any(
+                fnmatchcase(part, pattern) for part in key.split('/', 1))
+        ]
+
+    def _select(self, pattern: str, kind: str) -> Tuple[int, ...]:
+        """Open (once) the input files selected by pattern."""
+        fds = self._selected.get((pattern, kind))
+        if fds is None:
+            fds = tuple(
+                os.open(self.inputs[kind][key], os.O_RDONLY)
+                for key in self.labels(pattern, kind))
+            self._selected[(pattern, kind)] = fds
+        return fds
+
+    def read(self, pattern: str = '*', kind: str = 'temp') -> List[float]:
+        """
+        Read current values of inputs selected by pattern.
+
+        Parameters
+        -----------
+        pattern : str
+            glob pattern or alias
+        kind : {temp, fan}
+            kind of input
+
+        Returns
+        --------
+        List[float]
+            Current values, in degree Celsius for temp, RPM for fan
+        """
+        if monotonic() - self._checked > self.recheck:
+            self._checked = monotonic()
+            if self._list_devices() != self._devices:
+                self.build()
+        try:
+            fds = self._select(pattern, kind)
+            return [float(os.pread(fd, 32, 0)) * SCALE[kind] for fd in fds]
+        except (OSError, ValueError):
+            # device went away or was replaced
+            self.build()
+        try:
+            fds = self._select(pattern, kind)
+            return [float(os.pread(fd, 32, 0)) * SCALE[kind] for fd in fds]
+        except (OSError, ValueError):
+            return []
+
+
+@lru_cache(maxsize=None)
+def hwmon_index() -> HwmonIndex:
+    """Shared index, built once on first use."""
+    return HwmonIndex()
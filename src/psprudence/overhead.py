@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Self-overhead of the monitor.
+
+Monitor accounts its own cost:
+
+- CPU time of itself and of its finished children (``sh:``, ``os:``
+  probes), as percent of one CPU
+- resident memory
+- wakeups (voluntary and involuntary context switches) per minute
+
+CPU time of each sensor's call is charged to that sensor. At the end of
+every accounting ``window``, if CPU use exceeds the budget, the most
+expensive sensor is called only every other tick (then every 4th, 8th,
+... up to ``max_every``). The first throttle is warned with the probes
+that caused it. When a window closes under budget, the latest throttled
+sensor is called twice as often again, if its doubled cost still fits
+the budget.
+
+Budget is configured in ``global`` configuration:
+
+.. code-block:: yaml
+
+   global:
+     overhead:
+       cpu: 2  # percent of one CPU
+       window: 60  # seconds
+       max_every: 16  # ticks
+
+Live isolated workers (:mod:`psprudence.workers`) are not children that
+have finished, their CPU time is not accounted.
+"""
+
+import os
+from time import monotonic, thread_time
+from typing import List, Optional, Tuple
+
+from psprudence import print
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def rss() -> int:
+    """Resident memory of this process in bytes."""
+    try:
+        with open('/proc/self/statm', 'rb') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGESIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def children_cpu() -> float:
+    """CPU seconds of finished children."""
+    if resource is None:
+        return 0.
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def process_usage() -> Tuple[float, int]:
+    """CPU seconds of this process and its finished children, wakeups."""
+    if resource is None:
+        times = os.times()
+        return times.user + times.system, 0
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    return (own.ru_utime + own.ru_stime + children_cpu(),
+            own.ru_nvcsw + own.ru_nivcsw)
+
+
+class Overhead():
+    """
+    Account and throttle overhead of monitoring.
+
+    Parameters
+    -----------
+    names : List[str]
+        sensor names, sensor id is the index
+    cpu : float, optional
+        budget: percent of one CPU [default: no budget, only account]
+    window : float
+        seconds over which use is averaged
+    max_every : int
+        call throttled sensors at least once in these many ticks
+    """
+
+    def __init__(self,
+                 names: List[str],
+                 cpu: Optional[float] = None,
+                 window: float = 60.,
+                 max_every: int = 16):
+        self.names = names
+        self.cpu = cpu
+        self.window = window
+        self.max_every = max_every
+
+        self.every: List[int] = [1] * len(names)
+        """Sensor is called once in these many ticks."""
+
+        self.cost: List[float] = [0.] * len(names)
+        """CPU seconds charged to each sensor in current window."""
+
+        self.calls: List[int] = [0] * len(names)
+        """Calls of each sensor in current window."""
+
+        self.last: Tuple[List[float], List[int]] = ([], [])
+        """Cost and calls of each sensor in latest closed window."""
+
+        self.usage = (0., 0., 0)
+        """Latest window: CPU percent, resident bytes, wakeups per minute."""
+
+        self.warned = False
+        """Throttle was warned."""
+
+        self._throttled: List[int] = []
+        self._elapsed = window
+        self._start = monotonic()
+        self._cpu, self._wakeups = process_usage()
+
+    def due(self, sensor: int, count: int) -> bool:
+        """Sensor is due in tick number ``count``."""
+        return not count % self.every[sensor]
+
+    @staticmethod
+    def start() -> Tuple[float, float]:
+        """Mark start of a sensor's call."""
+        return thread_time(), children_cpu()
+
+    def charge(self, sensor: int, start: Tuple[float, float]):
+        """Charge CPU time since ``start`` to sensor."""
+        own, children = start
+        self.cost[sensor] += (thread_time() - own) + (children_cpu() -
+                                                      children)
+        self.calls[sensor] += 1
+
+    def tick(self) -> bool:
+        """
+        End of tick: close window if due, throttle if over budget.
+
+        Returns
+        --------
+        bool
+            a window was closed, :attr:`usage` is updated
+        """
+        stamp = monotonic()
+        elapsed = stamp - self._start
+        if elapsed < self.window:
+            return False
+        cpu, wakeups = process_usage()
+        self.usage = ((cpu - self._cpu) * 100 / elapsed, rss(),
+                      (wakeups - self._wakeups) * 60 / elapsed)
+        self._start, self._cpu, self._wakeups = stamp, cpu, wakeups
+        self._elapsed = elapsed
+        self.last = self.cost, self.calls
+        self.cost = [0.] * len(self.names)
+        self.calls = [0] * len(self.names)
+        if self.cpu is not None:
+            if self.usage[0] > self.cpu:
+                self.throttle()
+            else:
+                self.relax()
+        return True
+
+    def _expensive(self) -> List[int]:
+        """Sensors that cost CPU in latest window, most expensive first."""
+        cost = self.last[0]
+        return sorted((sensor for sensor, secs in enumerate(cost) if secs),
+                      key=cost.__getitem__,
+                      reverse=True)
+
+    def throttle(self) -> Optional[int]:
+        """
+        Halve call frequency of the sensor that was most expensive in
+        latest window.
+
+        Returns
+        --------
+        int
+            throttled sensor id
+        ``None``
+            all expensive sensors are throttled to ``max_every``
+        """
+        for sensor in self._expensive():
+            if self.every[sensor] < self.max_every:
+                self.every[sensor] = min(self.every[sensor] * 2,
+                                         self.max_every)
+                self._throttled.append(sensor)
+                break
+        else:
+            return None
+        if not self.warned:
+            self.warned = True
+            print(f'psprudence used {self.usage[0]:.2f}% CPU, '
+                  f'budget {self.cpu}%. Throttling:',
+                  mark='warn')
+            print(self.report(), mark='warn')
+        return sensor
+
+    def relax(self) -> Optional[int]:
+        """
+        Double call frequency of the latest throttled sensor, if its
+        doubled cost fits the budget.
+
+        Returns
+        --------
+        int
+            relaxed sensor id
+        ``None``
+            no sensor is throttled or budget would be exceeded
+        """
+        if not self._throttled:
+            return None
+        sensor = self._throttled[-1]
+        extra = self.last[0][sensor] * 100 / self._elapsed
+        if self.usage[0] + extra > self.cpu:  # type: ignore [operator]
+            return None
+        self._throttled.pop()
+        self.every[sensor] = max(self.every[sensor] // 2, 1)
+        return sensor
+
+    def report(self) -> str:
+        """Overhead and most expensive sensors in latest window."""
+        cpu, resident, wakeups = self.usage
+        lines = [
+            f'CPU {cpu:.2f}%, RSS {resident / (1 << 20):.1f} MiB, '
+            f'{wakeups:.0f} wakeups/min'
+        ]
+        cost, calls = self.last
+        for sensor in self._expensive()[:5]:
+            per_call = cost[sensor] * 1000 / max(calls[sensor], 1)
+            lines.append(f'{self.names[sensor]:<16} '
+                         f'{cost[sensor] * 1000:8.1f} ms '
+                         f'({per_call:.2f} ms/call), '
+                         f'every {self.every[sensor]} ticks')
+        return '\n'.join(lines)
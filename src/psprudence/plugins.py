@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Plugin sensors.
+
+Installed packages provide probes through entry points in the group
+:data:`GROUP`:
+
+.. code-block:: cfg
+   :caption: setup.cfg of a plugin package
+
+   [options.entry_points]
+   psprudence.sensors =
+       gpu = psp_gpu.probes:utilization
+
+Configured as ``probe: 'plugin: gpu:arg1:arg2'``.
+
+Entry points are indexed once, on first use of a ``plugin:`` probe.
+A plugin's module is imported only when a configured sensor uses it.
+"""
+
+from functools import lru_cache
+from importlib import metadata
+from typing import Dict
+
+GROUP = 'psprudence.sensors'
+"""Entry point group of plugin sensors."""
+
+
+@lru_cache(maxsize=None)
+def plugin_index() -> Dict[str, metadata.EntryPoint]:
+    """Entry points of installed plugin sensors, by name."""
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, 'select'):
+        group = entry_points.select(group=GROUP)
+    else:  # python < 3.10
+        group = entry_points.get(GROUP, ())
+    return {entry.name: entry for entry in group}
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Power-aware scheduling profiles.
+
+Plug state is read from the outcome of the discharge sensor, which the
+monitor calls anyway: it is silenced while power is plugged and reports
+a value while running on battery. Plugging and unplugging wake the
+monitoring loop (see :mod:`psprudence.battery`), so that profiles switch
+on the next tick.
+
+Profiles are configured in ``global`` configuration:
+
+.. code-block:: yaml
+
+   global:
+     power:
+       sensor: discharge
+       battery:
+         interval: 30  # seconds between ticks
+         align: true  # ticks at multiples of interval on the wall clock
+         max_cost: 5  # skip sensors costlier than 5 ms CPU per call
+         disable: [cpu_peak, top_process]
+       ac: {}  # default: global interval, all sensors
+
+Aligned ticks fall on the same wall-clock instants as other periodic
+timers, so that the CPU wakes for them together.
+"""
+
+from time import time
+from typing import Any, Dict, List, Optional
+
+from psprudence.overhead import Overhead
+from psprudence.prudence import DISABLED, SILENCED, Prudence
+
+
+class PowerProfiles():
+    """
+    Switch scheduling profile with plug state.
+
+    Parameters
+    -----------
+    sensors : Dict[str, Prudence]
+        sensors by name, sensor id is the index
+    interval : float
+        interval of ``ac`` profile, unless configured
+    sensor : str
+        name of discharge sensor, which reports plug state
+    ac : Dict[str, Any]
+        profile while power is plugged
+    battery : Dict[str, Any]
+        profile while on battery
+    """
+
+    def __init__(self,
+                 sensors: Dict[str, Prudence],
+                 interval: float,
+                 sensor: str = 'discharge',
+                 ac: Optional[Dict[str, Any]] = None,
+                 battery: Optional[Dict[str, Any]] = None):
+        self.names = list(sensors)
+        self.interval = interval
+        self.profiles: Dict[str, Dict[str, Any]] = {
+            'ac': ac or {},
+            'battery': battery or {}
+        }
+
+        self.sensor: Optional[Prudence] = sensors.get(sensor)
+        """Discharge sensor, ``None``: plug state is unknown, stay on AC."""
+
+        self._sensor_id = (self.names.index(sensor)
+                           if sensor in sensors else -1)
+
+        self.profile = 'ac'
+        """Active profile."""
+
+        self.skip: List[bool] = [False] * len(self.names)
+        """Sensor is disabled in active profile."""
+
+        self.interval_now = interval
+        """Interval of active profile."""
+
+        self.align = False
+        """Align ticks to multiples of interval on the wall clock."""
+
+        self.cost: List[Optional[float]] = [None] * len(self.names)
+        """Latest measured CPU milliseconds per call, ``None``: not called."""
+
+        self.apply('ac')
+
+    @property
+    def on_battery(self) -> bool:
+        """Discharge sensor reported a value in its latest call."""
+        if self.sensor is None or self.sensor.value is None:
+            return False
+        return self.sensor.outcome not in (SILENCED, DISABLED)
+
+    def apply(self, profile: str, overhead: Optional[Overhead] = None):
+        """
+        Activate profile.
+
+        Parameters
+        -----------
+        profile : {ac, battery}
+            profile name
+        overhead : Overhead, optional
+            cost of sensors in latest window, for ``max_cost``
+        """
+        if overhead is not None:
+            cost, calls = overhead.last
+            for sensor, secs in enumerate(cost):
+                # skipped sensors keep their cost from when they ran
+                if calls[sensor]:
+                    self.cost[sensor] = secs * 1000 / calls[sensor]
+        config = self.profiles[profile]
+        self.profile = profile
+        self.interval_now = config.get('interval', self.interval)
+        self.align = config.get('align', False)
+        disable = set(config.get('disable', ()))
+        self.skip = [name in disable for name in self.names]
+        max_cost = config.get('max_cost')
+        if max_cost is not None:
+            for sensor, per_call in enumerate(self.cost):
+                if per_call is not None and per_call > max_cost:
+                    self.skip[sensor] = True
+        if self._sensor_id >= 0:
+            # plug state must be read in every profile
+            self.skip[self._sensor_id] = False
+
+    def update(self,
+               overhead: Optional[Overhead] = None,
+               closed: bool = False) -> bool:
+        """
+        Switch profile if plug state changed.
+
+        Parameters
+        -----------
+        overhead : Overhead, optional
+            cost of sensors, for ``max_cost``
+        closed : bool
+            ``overhead`` just closed a window: re-apply active profile
+            with latest costs
+
+        Returns
+        --------
+        bool
+            profile was switched
+        """
+        profile = 'battery' if self.on_battery else 'ac'
+        if profile == self.profile:
+            if closed and overhead is not None:
+                self.apply(profile, overhead)
+            return False
+        self.apply(profile, overhead)
+        return True
+
+    def timeout(self) -> float:
+        """Seconds to wait for the next tick."""
+        if not self.align:
+            return self.interval_now
+        return self.interval_now - time() % self.interval_now
@@ -19,9 +19,26 @@
 #
 """Prudence sensor."""
 
-from typing import Any, Callable, Dict, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
-from psprudence.build_meth import build_func_handle
+from psprudence.build_meth import build_func_handle, build_probe_handle
+from psprudence.checks import build_check
+
+QUIET, ALERT, SILENCED, DISABLED, FLAGGED = range(5)
+"""Outcomes of a call of :class:`Prudence`."""
+
+OUTCOMES = ('quiet', 'alert', 'silenced', 'disabled', 'flagged')
+"""
+Names of outcomes of a call:
+
+- quiet: value is not alarming
+- alert: value is alarming
+- silenced: probe returned ``False``
+- disabled: probe returned ``None``, sensor got disabled
+- flagged: probe returned ``True``, alert without value
+"""
 
 
 def default_alert_check(parent, val: Union[float, Any]) -> bool:
@@ -97,6 +114,9 @@ class Prudence():
                 - python: ``py: /path/to/pyfile:funcname:arg1:arg2:arg3``
                 - shell-script: ``sh: /path/to/shfile:funcname:arg1:arg2:arg3``
 
+            Sensors with identical probe strings share a single call per tick,
+            see :func:`psprudence.build_meth.build_probe_handle`.
+
         Returns
         ~~~~~~~~
         float
@@ -116,14 +136,41 @@ class Prudence():
         Direction of panic is reversed [default: False]
     enabled : bool
         This alert is enabled
+    isolate : bool
+        Run ``py:`` probe in a worker process [default: False],
+        see :mod:`psprudence.workers`
+    cache_ttl : float
+        Reuse result of configured probe for these many seconds
+        [default: 0, only within the same tick]
+    priority : int
+        Higher priority sensors are called first and deferred last when a
+        tick exceeds its budget [default: 0], see :mod:`psprudence.schedule`
 
     panic : Union[Callable[[], Any], str]
         Function to be called if value is actionable.
 
         Type is same as `probe`'s type (Callable, str)
 
+    alert_check : Union[Callable[[Any, Any], bool], str, Dict[str, Any]]
+        Decides whether value is alarming.
+
+        Type is same as `probe`'s type (Callable, str), or
+
+        ``ex: <expression>``
+            threshold expression, see :mod:`psprudence.expressions`
+        Dict[str, Any]
+            built-in mode, see :mod:`psprudence.checks`
+
     """
 
+    handles = ('probe', 'panic', 'alert_check', 'attempt_reset')
+    """Handles that may be built from configuration strings."""
+
+    __slots__ = ('alert', 'min_warn', 'units', 'warn_res', 'reverse',
+                 'enabled', 'isolate', 'cache_ttl', 'priority', '_probe',
+                 '_panic', '_alert_check', '_attempt_reset', '_next_warn',
+                 '_tick', 'value', 'outcome', 'state')
+
     def __init__(self, alert: str, min_warn: float,
                  probe: Union[Callable, str], **kwargs):
         self.alert: str = alert
@@ -144,6 +191,15 @@ class Prudence():
         self.enabled: bool = kwargs.get('enabled', True)
         """This alert is enabled."""
 
+        self.isolate: bool = kwargs.get('isolate', False)
+        """Run ``py:`` probe in a worker process."""
+
+        self.cache_ttl: float = kwargs.get('cache_ttl', 0.)
+        """Seconds for which result of configured probe is reused."""
+
+        self.priority: int = kwargs.get('priority', 0)
+        """Order of calls in a tick, higher first."""
+
         self._probe: Union[Callable[[], Optional[Union[bool, float, str]]],
                            str] = probe
 
@@ -160,6 +216,18 @@ class Prudence():
 
         self._next_warn = self.min_warn
 
+        self._tick: Optional[Callable[[Optional[Union[bool, Any]]],
+                                      Optional[str]]] = None
+
+        self.value: Optional[Union[bool, float, Any]] = None
+        """Latest value, ``None`` until called."""
+
+        self.outcome: int = QUIET
+        """Outcome of latest call, index in :data:`OUTCOMES`."""
+
+        self.state: Dict[str, Any] = {}
+        """State of custom callbacks (attributes are fixed by slots)."""
+
     def __str__(self) -> str:
         direct = 'decreasing' if self.reverse else 'increasing'
         return f'Warn {self.alert} {direct} beyond {self.min_warn}{self.units}'
@@ -187,12 +255,14 @@ class Prudence():
         """
         if isinstance(self._probe, Callable):
             return self._probe
-        self._probe = build_func_handle(self._probe, self.alert + ' probe')
+        self._probe = build_probe_handle(self._probe, self.alert + ' probe',
+                                         self.isolate, self.cache_ttl)
         return self._probe
 
     @probe.setter
     def probe(self, callback: Callable[[], Any]):
         self._probe = callback
+        self._tick = None
 
     @property
     def panic(self) -> Callable[[], Any]:
@@ -213,6 +283,7 @@ class Prudence():
     @panic.setter
     def panic(self, callback: Callable[[], Any]):
         self._panic = callback
+        self._tick = None
 
     @property
     def alert_check(self) -> Callable[[Any, Union[float, Any]], bool]:
@@ -231,10 +302,15 @@ class Prudence():
         Returns
         --------
         Callable[[Any, Union[float, Any]], bool]
-            If alert should be called
+            If alert should be called.
+            A returned string is appended to the notification.
         """
         if isinstance(self._alert_check, Callable):
             return self._alert_check
+        if isinstance(self._alert_check, dict):
+            self._alert_check = build_check(self._alert_check,
+                                            self.alert + ' alert_check')
+            return self._alert_check
         self._alert_check = build_func_handle(self._alert_check,
                                               self.alert + ' alert_check')
         return self._alert_check
@@ -242,6 +318,7 @@ class Prudence():
     @alert_check.setter
     def alert_check(self, callback: Callable[[Any, Union[float, Any]], bool]):
         self._alert_check = callback
+        self._tick = None
 
     @property
     def attempt_reset(self) -> Callable[[Any, float], Any]:
@@ -266,6 +343,7 @@ class Prudence():
     @attempt_reset.setter
     def attempt_reset(self, callback: Callable[[Any, float], Any]):
         self._attempt_reset = callback
+        self._tick = None
 
     def __repr__(self):
         kwargs = [
@@ -275,6 +353,71 @@ class Prudence():
         ]
         return (str(self.__class__) + '(' + ', '.join(kwargs) + ')')
 
+    def freeze(
+            self) -> Callable[[Optional[Union[bool, Any]]], Optional[str]]:
+        """
+        Resolve all handles once and bind them into a specialized call.
+
+        Handles are built (if they are configuration strings) and bound
+        as local variables of the returned callable, which skips
+        property look-ups on every call.
+        Replacing a handle through its property discards the frozen call.
+
+        Returns
+        --------
+        Callable[[Optional[Union[bool, Any]]], Optional[str]]
+            Same as :meth:`psprudence.prudence.Prudence.__call__`
+        """
+        probe = self.probe
+        panic = self.panic
+        alert_check = self.alert_check
+        attempt_reset = self.attempt_reset
+
+        def tick(val: Optional[Union[bool, Any]] = None) -> Optional[str]:
+            if val is None:
+                if not self.enabled:
+                    return None
+                val = probe()
+                if val is None:
+                    self.enabled = False
+                    self.outcome = DISABLED
+                    return None
+            self.value = val
+            if val is False:
+                self.outcome = SILENCED
+                return None
+            if val is True:
+                self.outcome = FLAGGED
+                panic()
+                return f'</u>{self.alert}</u>: alert'
+            try:
+                val = self.value = float(val)
+                fired = alert_check(self, val)
+                if fired:
+                    self.outcome = ALERT
+                    panic()
+                    note = f' ({fired})' if isinstance(fired, str) else ''
+                    return (f'<b>{self.alert}</b>: {val: 0.2f}{self.units}'
+                            + note)
+            except ValueError as err:
+                if any('success' in arg for arg in err.args):
+                    print(f'{self.alert}:')
+                    print('Probe shell/os command did not print anything.')
+                    print('Disabling.')
+                    self.enabled = False
+                    self.outcome = DISABLED
+                    return None
+                if alert_check(self, val):
+                    self.outcome = ALERT
+                    panic()
+                    return f'<b>{self.alert}</b>: {val}{self.units}'
+            self.outcome = QUIET
+            attempt_reset(self, val)
+            return None
+
+        self._tick = tick
+        return tick
+
     def __call__(self,
                  val: Optional[Union[bool, Any]] = None) -> Optional[str]:
         """
@@ -295,35 +438,7 @@ class Prudence():
             Alert notification string.
 
         """
-        if (not self.enabled) and (val is None):
-            return
-        if val is None:
-            val = self.probe()
-            if val is None:
-                self.enabled = False
-                return
-            if val is False:
-                return
-            if val is True:
-                self.panic()
-                return f'</u>{self.alert}</u>: alert'
-        try:
-            val = float(val)
-            if self.alert_check(self, val):
-                self.panic()
-                return f'<b>{self.alert}</b>: {val: 0.2f}{self.units}'
-        except ValueError as err:
-            if any('success' in arg for arg in err.args):
-                print(f'{self.alert}:')
-                print('Probe shell/os command did not print anything.')
-                print('Disabling.')
-                self.enabled = False
-                return None
-            if self.alert_check(self, val):
-                self.panic()
-                return f'<b>{self.alert}</b>: {val}{self.units}'
-        self.attempt_reset(self, val)
-        return
+        return (self._tick or self.freeze())(val)
 
 
 def create_alerts(config: Dict[str, Dict[str, Any]]) -> Dict[str, Prudence]:
@@ -345,3 +460,52 @@ def create_alerts(config: Dict[str, Dict[str, Any]]) -> Dict[str, Prudence]:
         for name, kwargs in config.items()
         if (name != 'global' and kwargs.get('enabled', True))
     }
+
+
+BuildReport = Dict[Tuple[str, str], Tuple[float, Optional[Exception]]]
+"""(sensor name, handle): (build seconds, failure)"""
+
+
+def _build(mon: Prudence,
+           handle: str) -> Tuple[float, Optional[Exception]]:
+    """Build a handle, time it and catch its failure."""
+    start = perf_counter()
+    try:
+        getattr(mon, handle)
+    except Exception as err:  # report every failure, whatever the cause
+        return perf_counter() - start, err
+    return perf_counter() - start, None
+
+
+def prepare(peripherals: Dict[str, Prudence],
+            workers: Optional[int] = None) -> BuildReport:
+    """
+    Build all handles of all sensors eagerly and in parallel.
+
+    Handles declared as configuration strings are built (imported,
+    written to temporary files, compiled) lazily on first access.
+    Building them all at start-up moves that cost and every failure
+    out of the monitoring loop.
+
+    Parameters
+    -----------
+    peripherals : Dict[str, Prudence]
+        sensors by name
+    workers : int, optional
+        parallel builders [default: as many as :class:`ThreadPoolExecutor`]
+
+    Returns
+    --------
+    BuildReport
+        (sensor name, handle): (build seconds, failure)
+        for each handle that was built from configuration
+    """
+    jobs: List[Tuple[str, str]] = [
+        (name, handle) for name, mon in peripherals.items()
+        for handle in Prudence.handles
+        if not isinstance(getattr(mon, '_' + handle), Callable)
+    ]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(lambda job: _build(peripherals[job[0]], job[1]),
+                           jobs)
+        return dict(zip(jobs, results))
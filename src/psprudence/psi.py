@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Linux Pressure Stall Information (PSI).
+
+``/proc/pressure/{cpu,memory,io}`` report the share of time in which
+some (or all) tasks stalled for want of the resource:
+
+.. code-block:: text
+
+   some avg10=0.00 avg60=0.00 avg300=0.00 total=0
+   full avg10=0.00 avg60=0.00 avg300=0.00 total=0
+
+Polled
+    :class:`PsiReader` keeps the files open and re-reads them.
+
+Triggered
+    :class:`PsiTriggers` registers kernel triggers (stall of ``stall``
+    ms within ``window`` ms). A single epoll thread waits on all of
+    them and, as soon as one fires, wakes the monitoring loop to run
+    only the sensors of that trigger, see :mod:`psprudence.events`.
+    Nothing is read between events.
+    Unprivileged triggers need a window that is a multiple of 2 seconds.
+"""
+
+import os
+import select
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from psprudence.events import subscribe, wake
+
+PRESSURE = Path('/proc/pressure')
+"""Linux pressure stall information."""
+
+AVERAGES = {'10': 0, '60': 1, '300': 2}
+"""Index of average window (seconds) among fields of a line."""
+
+
+class PsiReader():
+    """
+    Polled pressure stall averages.
+
+    Parameters
+    -----------
+    root : Path
+        pressure stall information directory
+    """
+
+    def __init__(self, root: Path = PRESSURE):
+        self.root = root
+        self._fds: Dict[str, int] = {}
+
+    def read(self,
+             resource: str = 'memory',
+             kind: str = 'some',
+             window: str = '10') -> Optional[float]:
+        """
+        Current stall average.
+
+        Parameters
+        -----------
+        resource : {cpu, memory, io}
+            stalled resource
+        kind : {some, full}
+            some or all non-idle tasks stalled
+        window : {10, 60, 300}
+            seconds of average
+
+        Returns
+        --------
+        float
+            percent of time stalled
+        ``None``
+            pressure stall information is unavailable
+        """
+        try:
+            fd = self._fds.get(resource)
+            if fd is None:
+                fd = self._fds[resource] = os.open(self.root / resource,
+                                                   os.O_RDONLY)
+            for line in os.pread(fd, 256, 0).decode().splitlines():
+                fields = line.split()
+                if fields and fields[0] == kind:
+                    return float(fields[1 + AVERAGES[str(window)]].split(
+                        '=', 1)[1])
+        except (OSError, ValueError, IndexError, KeyError):
+            pass
+        return None
+
+
+class PsiTriggers():
+    """
+    Kernel pressure stall triggers, watched by one epoll thread.
+
+    Parameters
+    -----------
+    root : Path
+        pressure stall information directory
+    """
+
+    def __init__(self, root: Path = PRESSURE):
+        self.root = root
+        self._epoll = select.epoll()
+        self._fds: Dict[Tuple[str, str, int, int], int] = {}
+        # written only by watcher, resp. only by probes: no lock needed
+        self._count: Dict[int, int] = {}
+        self._seen: Dict[int, int] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self,
+                 resource: str = 'memory',
+                 kind: str = 'some',
+                 stall: int = 150,
+                 window: int = 2000) -> int:
+        """
+        Register trigger, once for each set of parameters.
+
+        Parameters
+        -----------
+        resource : {cpu, memory, io}
+            stalled resource
+        kind : {some, full}
+            some or all non-idle tasks stalled
+        stall : int
+            milliseconds of stall ...
+        window : int
+            ... within these many milliseconds fire the trigger
+
+        Returns
+        --------
+        int
+            trigger id
+
+        Raises
+        -------
+        OSError
+            triggers are unsupported or not permitted
+        """
+        key = (resource, kind, int(stall), int(window))
+        fd = self._fds.get(key)
+        if fd is not None:
+            return fd
+        fd = os.open(self.root / resource, os.O_RDWR | os.O_NONBLOCK)
+        try:
+            os.write(fd,
+                     f'{kind} {key[2] * 1000} {key[3] * 1000}\0'.encode())
+            self._epoll.register(fd, select.EPOLLPRI)
+        except OSError:
+            os.close(fd)
+            raise
+        self._count[fd] = self._seen[fd] = 0
+        self._fds[key] = fd
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch,
+                                            name='psprudence-psi',
+                                            daemon=True)
+            self._thread.start()
+        return fd
+
+    def _watch(self):
+        """Wait for triggers, mark them fired and wake monitoring loop."""
+        while True:
+            try:
+                events = self._epoll.poll()
+            except InterruptedError:
+                continue
+            except OSError:
+                return
+            for fd, event in events:
+                if event & select.EPOLLERR:
+                    # trigger was destroyed
+                    self._epoll.unregister(fd)
+                    continue
+                self._count[fd] += 1
+                wake(('psi', fd))
+
+    def fired(self, trigger: int) -> bool:
+        """
+        Trigger fired since the previous check.
+
+        The running sensor subscribes to wakes by this trigger.
+
+        Parameters
+        -----------
+        trigger : int
+            trigger id from :meth:`register`
+        """
+        subscribe(('psi', trigger))
+        count = self._count.get(trigger, 0)
+        if count == self._seen.get(trigger, 0):
+            return False
+        self._seen[trigger] = count
+        return True
+
+
+@lru_cache(maxsize=None)
+def psi_reader() -> PsiReader:
+    """Shared polled reader."""
+    return PsiReader()
+
+
+@lru_cache(maxsize=None)
+def psi_triggers() -> PsiTriggers:
+    """Shared triggers and their watcher thread."""
+    return PsiTriggers()
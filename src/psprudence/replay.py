@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Replay recorded traces through alerting pipeline.
+
+Recorded values are injected into :class:`psprudence.prudence.Prudence`
+sensors as fast as possible, with a simulated clock set to each
+sample's timestamp. Probes and panics are never run: panics are only
+counted. Use this to tune ``min_warn``, ``warn_res`` and ``alert_check``
+against recorded data.
+"""
+
+from datetime import datetime
+from math import isnan
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from psprudence import clock, print
+from psprudence.prudence import Prudence, create_alerts
+from psprudence.trace import Sample, read_trace
+
+
+class ReplayStats():
+    """Replay outcome of a sensor."""
+
+    __slots__ = ('samples', 'alerts', 'panics', 'recorded', 'first', 'last')
+
+    def __init__(self):
+        self.samples = 0
+        """Replayed samples."""
+
+        self.alerts = 0
+        """Alerts that would have been notified."""
+
+        self.panics = 0
+        """Panics that would have been called."""
+
+        self.recorded = 0
+        """Alerts recorded in trace."""
+
+        self.first: Optional[float] = None
+        """Time of first alert."""
+
+        self.last: Optional[float] = None
+        """Time of last alert."""
+
+
+def _timestamp(stamp: Optional[float]) -> str:
+    """Readable timestamp: date-time if epoch, else seconds."""
+    if stamp is None:
+        return '-'
+    if stamp > 1e8:
+        return datetime.fromtimestamp(stamp).isoformat(' ', 'seconds')
+    return f'{stamp:.1f}s'
+
+
+def replay_samples(peripherals: Dict[str, Prudence],
+                   samples: Iterable[Sample],
+                   verbose: bool = True) -> Dict[str, ReplayStats]:
+    """
+    Replay samples through sensors.
+
+    Probe and panic handles of sensors are replaced.
+
+    Parameters
+    -----------
+    peripherals : Dict[str, Prudence]
+        sensors by name
+    samples : Iterable[Sample]
+        recorded samples
+    verbose : bool
+        print every alert as it would have been notified
+
+    Returns
+    --------
+    Dict[str, ReplayStats]
+        outcome by sensor name, ``'?'`` counts samples of unknown sensors
+    """
+    stats = {name: ReplayStats() for name in peripherals}
+    unknown = ReplayStats()
+    ticks = {}
+    for name, mon in peripherals.items():
+
+        def count_panic(_stats: ReplayStats = stats[name]):
+            _stats.panics += 1
+
+        mon.probe = lambda: None
+        mon.panic = count_panic
+        ticks[name] = mon.freeze()
+
+    sim_clock = clock.SimulatedClock()
+    clock.use(sim_clock)
+    try:
+        for sample in samples:
+            tick = ticks.get(sample.sensor)
+            if tick is None:
+                unknown.samples += 1
+                continue
+            sensor_stats = stats[sample.sensor]
+            sensor_stats.samples += 1
+            sensor_stats.recorded += sample.outcome in ('alert', 'flagged')
+            if sample.outcome in ('silenced', 'disabled'):
+                continue
+            sim_clock.stamp = sample.stamp
+            if sample.outcome == 'flagged':
+                # probe returned True: alert without value
+                alert: Optional[str] = tick(True)
+            elif isinstance(sample.value, float) and isnan(sample.value):
+                continue
+            else:
+                alert = tick(sample.value)
+            if alert is None:
+                continue
+            sensor_stats.alerts += 1
+            if sensor_stats.first is None:
+                sensor_stats.first = sample.stamp
+            sensor_stats.last = sample.stamp
+            if verbose:
+                print(_timestamp(sample.stamp), alert, mark='info')
+    finally:
+        clock.use()
+    if unknown.samples:
+        stats['?'] = unknown
+    return stats
+
+
+def replay(traces: Iterable[Path],
+           config: Dict[str, Dict[str, Any]],
+           quiet: bool = False) -> int:
+    """
+    Replay traces and report alerts and panics that would have fired.
+
+    Parameters
+    -----------
+    traces : Iterable[Path]
+        recorded traces (binary or CSV), replayed in given order
+    config : Dict[str, Dict[str, Any]]
+        configuration
+    quiet : bool
+        print only summary
+
+    Returns
+    --------
+    int
+        exit code
+    """
+    peripherals = create_alerts(config)
+
+    def samples():
+        for trace in traces:
+            yield from read_trace(trace)
+
+    stats = replay_samples(peripherals, samples(), verbose=not quiet)
+    print(f'{"sensor":<16} {"samples":>8} {"alerts":>7} {"recorded":>9} '
+          f'{"panics":>7}  first alert → last alert',
+          mark='info')
+    for name, sensor_stats in stats.items():
+        panics = (sensor_stats.panics
+                  if 'panic' in config.get(name, {}) else '-')
+        print(f'{name:<16} {sensor_stats.samples:>8} '
+              f'{sensor_stats.alerts:>7} {sensor_stats.recorded:>9} '
+              f'{panics:>7}  {_timestamp(sensor_stats.first)} → '
+              f'{_timestamp(sensor_stats.last)}',
+              mark='warn' if sensor_stats.alerts else 'info')
+    return 0
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Per-tick time budget.
+
+With ``tick_budget`` (seconds) in ``global`` configuration, sensors due
+in a tick are called in order of their ``priority`` (higher first).
+A sensor whose expected duration would carry the tick beyond the budget
+is deferred to the next tick, where deferred sensors are called first
+and are not deferred again.
+Sensors with priority of at least :data:`ALWAYS` are never deferred.
+
+Expected duration of a sensor is the exponentially weighted moving
+average of its call durations.
+
+.. code-block:: yaml
+
+   global:
+     tick_budget: 0.5
+
+   temperature:
+     priority: 10
+"""
+
+from typing import List, Optional, Sequence
+
+from psprudence import print
+
+ALWAYS = 10
+"""Sensors with at least this priority are never deferred."""
+
+SMOOTHING = 0.3
+"""Weight of latest call duration in expected duration."""
+
+
+class TickBudget():
+    """
+    Order and defer sensors to keep ticks within budget.
+
+    Parameters
+    -----------
+    names : List[str]
+        sensor names, sensor id is the index
+    priorities : Sequence[int]
+        priority of each sensor
+    budget : float, optional
+        seconds per tick [default: no budget, no deferral]
+    """
+
+    def __init__(self,
+                 names: List[str],
+                 priorities: Sequence[int],
+                 budget: Optional[float] = None):
+        self.names = names
+        self.priorities = list(priorities)
+        self.budget = budget
+
+        self.expected: List[float] = [0.] * len(names)
+        """Expected call duration (seconds) of each sensor."""
+
+        self.deferred: List[bool] = [False] * len(names)
+        """Sensor was deferred in latest tick."""
+
+        self.deferrals: List[int] = [0] * len(names)
+        """Deferrals of each sensor so far."""
+
+        self.warned = False
+        """First deferral was warned."""
+
+    def order(self, due: List[int]) -> List[int]:
+        """
+        Order in which due sensors are called.
+
+        Parameters
+        -----------
+        due : List[int]
+            ids of sensors due in this tick
+
+        Returns
+        --------
+        List[int]
+            deferred sensors first, then by descending priority
+        """
+        if self.budget is None:
+            return due
+        return sorted(due,
+                      key=lambda sensor:
+                      (not self.deferred[sensor], -self.priorities[sensor]))
+
+    def defer(self, sensor: int, elapsed: float) -> bool:
+        """
+        Decide whether to defer sensor.
+
+        Parameters
+        -----------
+        sensor : int
+            sensor id
+        elapsed : float
+            seconds spent in this tick so far
+
+        Returns
+        --------
+        bool
+            sensor is deferred to the next tick
+        """
+        if (self.budget is None or self.priorities[sensor] >= ALWAYS
+                or self.deferred[sensor]
+                or elapsed + self.expected[sensor] <= self.budget):
+            # a sensor deferred in the previous tick runs in this one
+            self.deferred[sensor] = False
+            return False
+        self.deferred[sensor] = True
+        self.deferrals[sensor] += 1
+        if not self.warned:
+            self.warned = True
+            print(f'Tick exceeds budget of {self.budget}s; '
+                  f'deferring {self.names[sensor]} '
+                  f'(expected {self.expected[sensor] * 1000:.1f} ms).',
+                  mark='warn')
+        return True
+
+    def charge(self, sensor: int, duration: float):
+        """Update expected duration of sensor with its latest call."""
+        self.expected[sensor] += SMOOTHING * (duration -
+                                              self.expected[sensor])
+
+    def report(self) -> str:
+        """Deferral counts of sensors that were deferred."""
+        return ', '.join(f'{self.names[sensor]}: {count}'
+                         for sensor, count in enumerate(self.deferrals)
+                         if count) or 'no deferrals'
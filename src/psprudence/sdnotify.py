@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Service manager notification (systemd ``Type=notify``).
+
+Speaks the ``sd_notify`` datagram protocol on ``$NOTIFY_SOCKET``:
+
+- ``READY=1`` once handles of all sensors are built
+- ``WATCHDOG=1`` from the monitoring loop, every half ``$WATCHDOG_USEC``
+- ``STATUS=...`` with latency of latest tick
+- ``STOPPING=1`` on the way out
+
+Without ``$NOTIFY_SOCKET`` (not started by systemd), nothing is sent.
+"""
+
+import os
+import socket
+from time import monotonic
+from typing import Optional
+
+from psprudence.events import wait as wait_tick
+
+STATUS_EVERY = 30.
+"""Seconds between status updates when watchdog is off."""
+
+
+class Notifier():
+    """
+    Notify service manager.
+
+    Parameters
+    -----------
+    address : str, optional
+        notification socket [default: ``$NOTIFY_SOCKET``],
+        leading ``@`` denotes an abstract socket
+    watchdog : float, optional
+        watchdog timeout in seconds
+        [default: ``$WATCHDOG_USEC`` if ``$WATCHDOG_PID`` is unset or
+        this process]
+    """
+
+    def __init__(self,
+                 address: Optional[str] = None,
+                 watchdog: Optional[float] = None):
+        address = address or os.environ.get('NOTIFY_SOCKET')
+        if address and address[0] == '@':
+            address = '\0' + address[1:]
+        self.address = address
+        """Notification socket."""
+
+        if watchdog is None:
+            watchdog = self._watchdog_env()
+        self.watchdog = watchdog
+        """Watchdog timeout (seconds), ``None`` if off."""
+
+        self.period = STATUS_EVERY if watchdog is None else watchdog / 2
+        """Seconds between heartbeats."""
+
+        self._last = float('-inf')
+        self._sock: Optional[socket.socket] = None
+        if address:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+
+    @staticmethod
+    def _watchdog_env() -> Optional[float]:
+        """Watchdog timeout from environment, if it is meant for us."""
+        pid = os.environ.get('WATCHDOG_PID')
+        if pid and pid != str(os.getpid()):
+            return None
+        try:
+            return int(os.environ['WATCHDOG_USEC']) / 1e6 or None
+        except (KeyError, ValueError):
+            return None
+
+    @property
+    def enabled(self) -> bool:
+        """Notification socket is available."""
+        return self._sock is not None
+
+    def send(self, *assignments: str) -> bool:
+        """
+        Send ``KEY=value`` assignments in one datagram.
+
+        Returns
+        --------
+        bool
+            notification was sent
+        """
+        if self._sock is None:
+            return False
+        try:
+            self._sock.sendto('\n'.join(assignments).encode(), self.address)
+        except OSError:
+            return False
+        return True
+
+    def ready(self, status: str = '') -> bool:
+        """Startup is complete."""
+        if status:
+            return self.send('READY=1', f'STATUS={status}')
+        return self.send('READY=1')
+
+    def heartbeat(self, status: str = '') -> bool:
+        """
+        Pet watchdog and update status, if due.
+
+        Parameters
+        -----------
+        status : str
+            free-form status line
+        """
+        if self._sock is None:
+            return False
+        stamp = monotonic()
+        if stamp - self._last < self.period:
+            return False
+        self._last = stamp
+        assignments = [f'STATUS={status}'] if status else []
+        if self.watchdog is not None:
+            assignments.append('WATCHDOG=1')
+        return self.send(*assignments)
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Wait for the next tick, petting watchdog during long waits.
+
+        See :func:`psprudence.events.wait`.
+        """
+        if self.watchdog is None or timeout <= self.period:
+            return wait_tick(timeout)
+        end = monotonic() + timeout
+        while True:
+            remaining = end - monotonic()
+            if remaining <= 0:
+                return False
+            if wait_tick(min(remaining, self.period)):
+                return True
+            self.heartbeat()
+
+    def stopping(self) -> bool:
+        """Service is shutting down."""
+        sent = self.send('STOPPING=1')
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        return sent
@@ -23,14 +23,227 @@ Functions that return of current values (float) of various sensors.
 This file may be used as template to define custom sensor probes
 """
 
+import heapq
+import os
+from pathlib import Path
+from time import monotonic
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
 import psutil
 
+from psprudence.cgroup import cgroup_dir, cgroup_files
+from psprudence.counters import (DISK_FIELDS, NET_FIELDS, SECTOR,
+                                 disk_stats, mount_table, net_stats)
+from psprudence.events import current_tick
+from psprudence.hwmon import HWMON, hwmon_index
+from psprudence.psi import psi_reader, psi_triggers
+
+PROC = Path('/proc')
+"""Linux proc filesystem."""
+
+CLK_TCK: int = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+"""Kernel clock ticks per second, unit of ``/proc`` cpu counters."""
+
+
+class _TickSampler():
+    """
+    Share one sample of cumulative counters among all probes of a tick.
+
+    Several sensors (e.g. ``cpu_core:0``, ``cpu_core:1``, ``cpu_peak``)
+    diff the same counters. Samples requested in the same tick of the
+    monitoring loop (see :func:`psprudence.events.current_tick`) are
+    served from the latest sample, so that each tick reads the counters
+    only once and every probe diffs the same pair of samples.
+
+    Parameters
+    -----------
+    read : Callable[[], Any]
+        reads current counters
+    """
+
+    def __init__(self, read: Callable[[], Any]):
+        self.read = read
+        self.prev: Any = None
+        self.curr: Any = None
+        self._prev_stamp = 0.
+        self._stamp = -float('inf')
+        self._tick = 0
+
+    def __call__(self) -> Tuple[Any, Any, float]:
+        """
+        Returns
+        --------
+        Tuple[Any, Any, float]
+            previous sample, current sample, seconds between them
+        """
+        tick = current_tick()
+        if tick == 0 or tick != self._tick:
+            self._tick = tick
+            self.prev, self._prev_stamp = self.curr, self._stamp
+            self.curr, self._stamp = self.read(), monotonic()
+        return self.prev, self.curr, self._stamp - self._prev_stamp
+
+
+def _read_core_ticks() -> List[Tuple[int, int]]:
+    """
+    Read per-core (busy, total) clock ticks from ``/proc/stat``.
+
+    Guest time is already accounted in user time and is skipped.
+    """
+    ticks = []
+    with open(PROC / 'stat') as stat:
+        for line in stat:
+            if not line.startswith('cpu'):
+                break
+            if not line[3].isdigit():
+                continue  # aggregate line
+            fields = [int(field) for field in line.split()[1:9]]
+            total = sum(fields)
+            ticks.append((total - fields[3] - fields[4], total))
+    return ticks
+
+
+_CORE_SAMPLER = _TickSampler(_read_core_ticks)
+
+
+def _core_percents() -> Optional[List[float]]:
+    """
+    Per-core usage since previous tick.
+
+    Returns
+    --------
+    List[float]
+        usage percent of each core
+    ``None``
+        no previous sample (first tick or cores were hot-plugged)
+    """
+    if not (PROC / 'stat').is_file():
+        return psutil.cpu_percent(percpu=True)
+    prev, curr, _ = _CORE_SAMPLER()
+    if prev is None or len(prev) != len(curr):
+        return None
+    percents = []
+    for (busy_0, total_0), (busy_1, total_1) in zip(prev, curr):
+        elapsed = total_1 - total_0
+        percents.append(100 * (busy_1 - busy_0) / elapsed if elapsed else 0.)
+    return percents
+
 
 def cpu():
     """CPU usage."""
     return psutil.cpu_percent()
 
 
+def cpu_core(core: str = '0'):
+    """
+    CPU usage of a single core.
+
+    Parameters
+    -----------
+    core : str
+        core index as listed in ``/proc/stat``
+    """
+    percents = _core_percents()
+    if percents is None:
+        return False
+    try:
+        return percents[int(core)]
+    except IndexError:
+        return None
+
+
+def cpu_peak():
+    """CPU usage of the busiest core."""
+    percents = _core_percents()
+    if not percents:
+        return False
+    return max(percents)
+
+
+_PROC_NAMES: Dict[int, str] = {}
+"""Cached process names, updated only for new or exited pids."""
+
+
+def _read_proc_ticks() -> Dict[int, int]:
+    """
+    Read user + system clock ticks of every process.
+
+    Process cache is refreshed only for new or exited pids.
+    """
+    pids = {
+        int(entry.name)
+        for entry in os.scandir(PROC) if entry.name.isdigit()
+    }
+    for pid in _PROC_NAMES.keys() - pids:
+        del _PROC_NAMES[pid]
+    ticks: Dict[int, int] = {}
+    for pid in pids:
+        try:
+            with open(PROC / str(pid) / 'stat', 'rb') as stat:
+                raw = stat.read()
+        except OSError:
+            continue  # exited in the meantime
+        # comm may contain spaces and parentheses: split at the last ')'
+        name_end = raw.rfind(b')')
+        fields = raw[name_end + 2:].split()
+        ticks[pid] = int(fields[11]) + int(fields[12])
+        if pid not in _PROC_NAMES:
+            _PROC_NAMES[pid] = raw[raw.find(b'(') + 1:name_end].decode(
+                errors='replace')
+    return ticks
+
+
+_PROC_SAMPLER = _TickSampler(_read_proc_ticks)
+
+
+def _top_consumers(
+        count: int = 5) -> Optional[List[Tuple[str, int, float]]]:
+    """
+    Processes that consumed most CPU since previous tick.
+
+    Parameters
+    -----------
+    count : int
+        number of processes to report
+
+    Returns
+    --------
+    List[Tuple[str, int, float]]
+        (name, pid, percent of one core) sorted by decreasing usage
+    ``None``
+        no previous sample or ``/proc`` is unavailable
+    """
+    if not PROC.is_dir():
+        return None
+    prev, curr, elapsed = _PROC_SAMPLER()
+    if prev is None or elapsed <= 0:
+        return None
+    scale = 100 / (CLK_TCK * elapsed)
+    usage = ((ticks - prev[pid], pid) for pid, ticks in curr.items()
+             if pid in prev)
+    return [(_PROC_NAMES.get(pid, '?'), pid, delta * scale)
+            for delta, pid in heapq.nlargest(count, usage)]
+
+
+def top_process(rank: str = '1'):
+    """
+    CPU usage of the process ranked ``rank`` among top consumers.
+
+    Parameters
+    -----------
+    rank : str
+        1 for the top consumer, 2 for the next, ...
+    """
+    if not PROC.is_dir():
+        return None
+    consumers = _top_consumers(int(rank))
+    if consumers is None:
+        return False
+    if len(consumers) < int(rank):
+        return False
+    return consumers[-1][2]
+
+
 def load(minutes: str = '1'):
     """
     CPU load.
@@ -44,11 +257,396 @@ def load(minutes: str = '1'):
     return psutil.getloadavg()[segment] * 100 / psutil.cpu_count()
 
 
-def temperature():
-    "Core temperature."
-    return psutil.sensors_temperatures()['coretemp'][0].current
+def temperature(label: str = 'package'):
+    """
+    Hottest temperature among hwmon sensors selected by label.
+
+    Parameters
+    -----------
+    label : str
+        label glob pattern, see :mod:`psprudence.hwmon`
+    """
+    if not HWMON.is_dir():
+        return None
+    values = hwmon_index().read(label, 'temp')
+    if not values:
+        return None
+    return max(values)
+
+
+def fan(label: str = '*'):
+    """
+    Fastest fan speed among hwmon fans selected by label.
+
+    Parameters
+    -----------
+    label : str
+        label glob pattern, see :mod:`psprudence.hwmon`
+    """
+    if not HWMON.is_dir():
+        return None
+    values = hwmon_index().read(label, 'fan')
+    if not values:
+        return None
+    return max(values)
 
 
 def memory():
     "RAM usage."
     return psutil.virtual_memory().percent
+
+
+def pressure(resource: str = 'memory',
+             kind: str = 'some',
+             window: str = '10') -> Optional[float]:
+    """
+    Pressure stall average, polled.
+
+    Parameters
+    -----------
+    resource : {cpu, memory, io}
+        stalled resource
+    kind : {some, full}
+        some or all non-idle tasks stalled
+    window : {10, 60, 300}
+        seconds of average
+
+    Returns
+    --------
+    float
+        percent of time stalled
+    ``None``
+        pressure stall information is unavailable (disables sensor)
+    """
+    return psi_reader().read(resource, kind, window)
+
+
+def pressure_trigger(resource: str = 'memory',
+                     kind: str = 'some',
+                     stall: str = '150',
+                     window: str = '2000') -> Optional[bool]:
+    """
+    Pressure stall trigger: alert as soon as stall crosses threshold.
+
+    The kernel watches stall time. When the trigger fires, the monitoring
+    loop is woken to run only this sensor. Calls between events cost
+    nothing.
+
+    Parameters
+    -----------
+    resource : {cpu, memory, io}
+        stalled resource
+    kind : {some, full}
+        some or all non-idle tasks stalled
+    stall : str
+        milliseconds of stall ...
+    window : str
+        ... within these many milliseconds fire the trigger
+
+    Returns
+    --------
+    ``True``
+        trigger fired since previous call (alert without value)
+    ``False``
+        trigger did not fire
+    ``None``
+        triggers are unavailable (disables sensor)
+    """
+    try:
+        triggers = psi_triggers()
+        trigger = triggers.register(resource, kind, int(stall), int(window))
+    except (OSError, AttributeError):
+        return None
+    return triggers.fired(trigger)
+
+
+DISK_METRICS: Dict[str, Tuple[str, ...]] = {
+    'read': ('read_sectors', ),
+    'write': ('write_sectors', ),
+    'total': ('read_sectors', 'write_sectors'),
+    'iops': ('reads', 'writes'),
+    'latency': ('reads', 'writes', 'read_ms', 'write_ms'),
+    'util': ('io_ms', )
+}
+"""Metrics of :func:`disk_io`: counters they are computed from."""
+
+NET_METRICS: Dict[str, Tuple[str, ...]] = {
+    'rx': ('rx_bytes', ),
+    'tx': ('tx_bytes', ),
+    'total': ('rx_bytes', 'tx_bytes'),
+    'errors': ('rx_errors', 'tx_errors')
+}
+"""Metrics of :func:`network`: counters they are computed from."""
+
+
+def disk_usage(mount: str = '/') -> Optional[float]:
+    """
+    Fullest filesystem among selected mount points.
+
+    Parameters
+    -----------
+    mount : str
+        mount point glob patterns, see :mod:`psprudence.counters`
+
+    Returns
+    --------
+    float
+        percent of space used (as ``df`` does, reserved blocks excluded)
+    ``False``
+        no filesystem is mounted at selected points
+    ``None``
+        mount table is unavailable (disables sensor)
+    """
+    try:
+        points = mount_table().select(mount)
+    except OSError:
+        return None
+    usage = []
+    for point in points:
+        try:
+            stat = os.statvfs(point)
+        except OSError:
+            continue
+        if not stat.f_blocks:
+            continue  # pseudo filesystem
+        used = stat.f_blocks - stat.f_bfree
+        usage.append(100 * used / (used + stat.f_bavail))
+    if not usage:
+        return False
+    return max(usage)
+
+
+def disk_io(device: str = 'disks', metric: str = 'total') -> Optional[float]:
+    """
+    Block device IO since previous tick.
+
+    Parameters
+    -----------
+    device : str
+        device glob patterns or ``disks``, see :mod:`psprudence.counters`
+    metric : str
+        - read, write, total: throughput (MiB/s) summed over devices
+        - iops: completed operations per second summed over devices
+        - latency: mean milliseconds per completed operation
+        - util: busiest device's percent of time with IO in flight
+
+    Returns
+    --------
+    float
+        value of metric
+    ``False``
+        no previous sample or no device is selected
+    ``None``
+        ``/proc/diskstats`` is unavailable or metric is unknown
+        (disables sensor)
+    """
+    if metric not in DISK_METRICS:
+        return None
+    table = disk_stats()
+    try:
+        elapsed = table.sample()
+    except OSError:
+        return None
+    devices = table.select(device)
+    if not (elapsed and devices):
+        return False
+    if metric == 'util':
+        field = DISK_FIELDS.index('io_ms')
+        return max(table.delta(dev, field)
+                   for dev in devices) / (10 * elapsed)
+    fields = DISK_METRICS[metric]
+    totals = [
+        sum(table.delta(dev, DISK_FIELDS.index(name)) for dev in devices)
+        for name in fields
+    ]
+    if metric == 'latency':
+        ops = totals[0] + totals[1]
+        return (totals[2] + totals[3]) / ops if ops else 0.
+    if metric == 'iops':
+        return sum(totals) / elapsed
+    return sum(totals) * SECTOR / (elapsed * 2**20)
+
+
+def network(interface: str = '*,!lo',
+            metric: str = 'total') -> Optional[float]:
+    """
+    Network traffic since previous tick, summed over interfaces.
+
+    Parameters
+    -----------
+    interface : str
+        interface glob patterns, see :mod:`psprudence.counters`
+    metric : str
+        - rx, tx, total: throughput (MiB/s)
+        - errors: errors and drops per second
+
+    Returns
+    --------
+    float
+        value of metric
+    ``False``
+        no previous sample or no interface is selected
+    ``None``
+        ``/proc/net/dev`` is unavailable or metric is unknown
+        (disables sensor)
+    """
+    if metric not in NET_METRICS:
+        return None
+    table = net_stats()
+    try:
+        elapsed = table.sample()
+    except OSError:
+        return None
+    interfaces = table.select(interface)
+    if not (elapsed and interfaces):
+        return False
+    fields = NET_METRICS[metric]
+    total = sum(
+        table.delta(dev, NET_FIELDS.index(name)) for dev in interfaces
+        for name in fields)
+    if metric == 'errors':
+        return total / elapsed
+    return total / (elapsed * 2**20)
+
+
+def cgroup_memory(path: str = 'user.slice') -> Optional[float]:
+    """
+    Memory usage of a cgroup.
+
+    Parameters
+    -----------
+    path : str
+        cgroup path, see :mod:`psprudence.cgroup`
+
+    Returns
+    --------
+    float
+        percent of ``memory.max`` (of host memory if unlimited)
+    ``False``
+        cgroup does not exist (yet)
+    ``None``
+        cgroup v2 is unavailable (disables sensor)
+    """
+    files = cgroup_files()
+    if not files.available():
+        return None
+    cgroup = cgroup_dir(path)
+    try:
+        current = int(files.read(cgroup / 'memory.current'))
+        limit = files.limit(cgroup, 'memory.max')
+    except (OSError, ValueError):
+        return False
+    total = int(limit) if limit else psutil.virtual_memory().total
+    return 100 * current / total
+
+
+def cgroup_cpu(path: str = 'user.slice',
+               metric: str = 'usage') -> Optional[float]:
+    """
+    CPU usage of a cgroup since previous tick.
+
+    Parameters
+    -----------
+    path : str
+        cgroup path, see :mod:`psprudence.cgroup`
+    metric : str
+        - usage: percent of ``cpu.max`` quota (of all cores if unlimited)
+        - throttled: percent of time throttled by ``cpu.max``
+
+    Returns
+    --------
+    float
+        value of metric
+    ``False``
+        cgroup does not exist (yet) or no previous sample
+    ``None``
+        cgroup v2 is unavailable or metric is unknown (disables sensor)
+    """
+    if metric not in ('usage', 'throttled'):
+        return None
+    files = cgroup_files()
+    if not files.available():
+        return None
+    cgroup = cgroup_dir(path)
+    try:
+        delta, elapsed = files.delta(cgroup / 'cpu.stat')
+        if metric == 'throttled':
+            limit = None
+        else:
+            limit = files.limit(cgroup, 'cpu.max')
+    except OSError:
+        return False
+    if not elapsed:
+        return False
+    if metric == 'throttled':
+        return delta.get('throttled_usec', 0) / (1e4 * elapsed)
+    if limit:
+        quota, period = limit.split()
+        cores = int(quota) / int(period)
+    else:
+        cores = psutil.cpu_count()
+    return delta.get('usage_usec', 0) / (1e4 * elapsed * cores)
+
+
+def cgroup_pids(path: str = 'user.slice') -> Optional[float]:
+    """
+    Tasks in a cgroup.
+
+    Parameters
+    -----------
+    path : str
+        cgroup path, see :mod:`psprudence.cgroup`
+
+    Returns
+    --------
+    float
+        percent of ``pids.max`` (of kernel's ``pid_max`` if unlimited)
+    ``False``
+        cgroup does not exist (yet)
+    ``None``
+        cgroup v2 is unavailable (disables sensor)
+    """
+    files = cgroup_files()
+    if not files.available():
+        return None
+    cgroup = cgroup_dir(path)
+    try:
+        current = int(files.read(cgroup / 'pids.current'))
+        limit = (files.limit(cgroup, 'pids.max')
+                 or files.read(PROC / 'sys/kernel/pid_max'))
+        return 100 * current / int(limit)
+    except (OSError, ValueError):
+        return False
+
+
+def cgroup_events(path: str = 'user.slice',
+                  event: str = 'oom_kill') -> Optional[float]:
+    """
+    Memory events of a cgroup since previous tick.
+
+    Parameters
+    -----------
+    path : str
+        cgroup path, see :mod:`psprudence.cgroup`
+    event : {low, high, max, oom, oom_kill}
+        event counted in ``memory.events``
+
+    Returns
+    --------
+    float
+        number of events
+    ``False``
+        cgroup does not exist (yet) or no previous sample
+    ``None``
+        cgroup v2 is unavailable (disables sensor)
+    """
+    files = cgroup_files()
+    if not files.available():
+        return None
+    try:
+        delta, elapsed = files.delta(cgroup_dir(path) / 'memory.events')
+    except OSError:
+        return False
+    if not elapsed:
+        return False
+    return float(delta.get(event, 0))
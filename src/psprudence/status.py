@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Shared-memory status segment.
+
+The monitor publishes latest value and outcome of every sensor to a
+memory-mapped file ``${XDG_RUNTIME_DIR}/psprudence/status`` after each
+tick. Status-bar scripts read it without probing sensors again:
+
+.. code-block:: shell
+
+   psprudence-status --format '{cpu:.0f}% {memory:.0f}%'
+
+Layout (little-endian):
+
+- Header, :data:`HEADER`: magic, sequence, time of update, sensors count
+- Entries, :data:`ENTRY`: name (utf-8, 32 bytes), value, outcome
+
+Updates are guarded by a sequence lock: writer makes the sequence odd
+before and even after an update. Readers retry while the sequence is
+odd or changed during the read.
+
+This module deliberately imports nothing heavy, so that readers start
+quickly.
+"""
+
+import mmap
+import os
+import struct
+import tempfile
+from argparse import ArgumentParser
+from math import nan
+from pathlib import Path
+from time import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+MAGIC = b'PSPSTAT1'
+"""Leading bytes of status segment."""
+
+HEADER = struct.Struct('<8sQdI4x')
+"""magic, sequence, time of update, sensors count"""
+
+SEQ = struct.Struct('<Q')
+"""Sequence, at offset ``len(MAGIC)``."""
+
+ENTRY = struct.Struct('<32sdB7x')
+"""name, value, outcome"""
+
+STATES = ('quiet', 'alert', 'silenced', 'disabled', 'flagged')
+"""Outcome names, same as :data:`psprudence.prudence.OUTCOMES`."""
+
+Status = Dict[str, Tuple[float, str]]
+"""Value and outcome by sensor name."""
+
+
+def status_path() -> Path:
+    """Location of status segment."""
+    runtime = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime:
+        return Path(runtime) / 'psprudence' / 'status'
+    return Path(tempfile.gettempdir()) / f'psprudence-{os.getuid()}' / 'status'
+
+
+class StatusWriter():
+    """
+    Publish latest values of sensors.
+
+    Parameters
+    -----------
+    names : List[str]
+        sensor names in order of publication
+    path : Path, optional
+        status segment [default: :func:`status_path`]
+    """
+
+    def __init__(self, names: List[str], path: Optional[Path] = None):
+        self.path = path or status_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        size = HEADER.size + ENTRY.size * len(names)
+        # build aside and move in place: readers never see a partial file
+        temp = self.path.with_suffix(f'.{os.getpid()}')
+        with open(temp, 'wb') as segment:
+            segment.write(HEADER.pack(MAGIC, 0, time(), len(names)))
+            for name in names:
+                # cut at 32 bytes, on a character boundary
+                label = name.encode()[:32].decode(errors='ignore').encode()
+                segment.write(ENTRY.pack(label, nan, 0))
+        os.replace(temp, self.path)
+        with open(self.path, 'r+b') as segment:
+            self._map = mmap.mmap(segment.fileno(), size)
+        self._seq = 0
+
+    def publish(self, stamp: float, values: Iterable[Tuple[Any, int]]):
+        """
+        Publish values.
+
+        Parameters
+        -----------
+        stamp : float
+            time of values
+        values : Iterable[Tuple[Any, int]]
+            (value, outcome) of each sensor, in order of names.
+            Non-float values are published as ``nan``.
+        """
+        self._seq += 1
+        SEQ.pack_into(self._map, len(MAGIC), self._seq)
+        struct.pack_into('<d', self._map, len(MAGIC) + SEQ.size, stamp)
+        offset = HEADER.size + 32  # skip name
+        for value, outcome in values:
+            if not isinstance(value, float):
+                value = nan
+            struct.pack_into('<dB', self._map, offset, value, outcome)
+            offset += ENTRY.size
+        self._seq += 1
+        SEQ.pack_into(self._map, len(MAGIC), self._seq)
+
+    def close(self, remove: bool = True):
+        """
+        Close status segment.
+
+        Parameters
+        -----------
+        remove : bool
+            remove status segment, readers find no status
+        """
+        self._map.close()
+        if remove:
+            self.path.unlink(missing_ok=True)
+
+
+class StatusReader():
+    """
+    Read latest values of sensors.
+
+    The segment is mapped once. Reads access only the mapped memory.
+
+    Parameters
+    -----------
+    path : Path, optional
+        status segment [default: :func:`status_path`]
+
+    Raises
+    -------
+    FileNotFoundError
+        monitor is not running
+    ValueError
+        not a status segment
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path or status_path()
+        with open(self.path, 'rb') as segment:
+            self._map = mmap.mmap(segment.fileno(),
+                                  0,
+                                  access=mmap.ACCESS_READ)
+        magic, _, _, count = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f'{self.path} is not a psprudence status')
+        self.names: List[str] = [
+            ENTRY.unpack_from(self._map, HEADER.size + index *
+                              ENTRY.size)[0].rstrip(b'\0').decode(
+                                  errors='replace')
+            for index in range(count)
+        ]
+        """Sensor names."""
+
+    def read(self, retries: int = 1000) -> Tuple[float, Status]:
+        """
+        Consistent snapshot of status.
+
+        Parameters
+        -----------
+        retries : int
+            attempts while writer is updating
+
+        Returns
+        --------
+        Tuple[float, Status]
+            time of update, {name: (value, outcome)}
+
+        Raises
+        -------
+        TimeoutError
+            writer kept updating during all attempts
+        """
+        for _ in range(retries):
+            (seq, ) = SEQ.unpack_from(self._map, len(MAGIC))
+            if seq % 2:
+                continue
+            snapshot = self._map[:]
+            if SEQ.unpack_from(self._map, len(MAGIC))[0] == seq:
+                break
+        else:
+            raise TimeoutError('status kept changing while reading')
+        stamp = HEADER.unpack_from(snapshot)[2]
+        values = {}
+        for index, name in enumerate(self.names):
+            _, value, outcome = ENTRY.unpack_from(
+                snapshot, HEADER.size + index * ENTRY.size)
+            values[name] = value, STATES[outcome]
+        return stamp, values
+
+    def close(self):
+        """Unmap status segment."""
+        self._map.close()
+
+
+def main() -> int:
+    """Print status of sensors published by running monitor."""
+    parser = ArgumentParser(
+        prog='psprudence-status',
+        description='Print latest values published by psprudence monitor.')
+    parser.add_argument('sensors',
+                        nargs='*',
+                        help='Print only these sensors [default: all]')
+    parser.add_argument('-f',
+                        '--format',
+                        default=None,
+                        help="python format string, e.g. '{cpu:.0f}%%'")
+    parser.add_argument('-p',
+                        '--path',
+                        type=Path,
+                        default=None,
+                        help='Status segment path')
+    args = parser.parse_args()
+    try:
+        reader = StatusReader(args.path)
+    except (FileNotFoundError, ValueError) as err:
+        print(f'psprudence status unavailable: {err}')
+        return 1
+    _, values = reader.read()
+    reader.close()
+    if args.format is not None:
+        print(args.format.format(
+            **{name: value
+               for name, (value, _) in values.items()}))
+        return 0
+    for name in (args.sensors or values):
+        value, outcome = values.get(name, (nan, 'unknown'))
+        print(f'{name}\t{value:.2f}\t{outcome}')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
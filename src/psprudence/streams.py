@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Streaming probes.
+
+A ``stream:`` probe starts a long-running producer (a shell command)
+once and reads its output in a background thread. Each call returns the
+latest value: the last field of the latest output line that parses as
+a number. Other lines (headers) are ignored.
+
+.. code-block:: yaml
+
+   idle:
+     alert: CPU Idle
+     min_warn: 10
+     reverse: true
+     probe: |-
+       stream: stdbuf -oL vmstat 5 |
+         while read -r _ _ _ _ _ _ _ _ _ _ _ _ _ _ idle _; do
+           echo "$idle"
+         done
+
+Producers must flush every line; many tools buffer output to pipes
+unless run through ``stdbuf -oL``.
+
+Until the producer prints its first value, the sensor is silenced.
+If the producer exits, it is restarted after a delay that doubles on
+every quick exit, up to :data:`MAX_BACKOFF` seconds.
+"""
+
+import os
+import signal
+import subprocess
+from threading import Event, Thread
+from time import monotonic
+from typing import List, Optional, Union
+
+from psprudence import print
+
+BACKOFF = 1.
+"""Seconds before first restart of an exited producer."""
+
+MAX_BACKOFF = 300.
+"""Longest delay between restarts; a producer that ran longer than this
+restarts after :data:`BACKOFF` again."""
+
+PRODUCERS: List['StreamProbe'] = []
+"""Started streaming probes."""
+
+
+def parse_line(line: str) -> Optional[float]:
+    """Last field of line, if it is a number."""
+    fields = line.split()
+    if not fields:
+        return None
+    try:
+        return float(fields[-1])
+    except ValueError:
+        return None
+
+
+class StreamProbe():
+    """
+    Latest value printed by a long-running producer.
+
+    Parameters
+    -----------
+    cmd : str
+        shell command that keeps printing values
+    util : str
+        name object that uses this probe (used to elaborate debug)
+    """
+
+    def __init__(self, cmd: str, util: str = 'UNKNOWN'):
+        self.cmd = cmd
+        self.util = util
+
+        self.latest: Optional[float] = None
+        """Latest value, ``None`` until producer prints one."""
+
+        self.restarts = 0
+        """Times producer was restarted."""
+
+        self._process: Optional[subprocess.Popen] = None
+        self._stop = Event()
+        self._thread = Thread(target=self._run,
+                              name=f'psprudence-stream {util}',
+                              daemon=True)
+        self._thread.start()
+        PRODUCERS.append(self)
+
+    def _run(self):
+        """Run producer, read its lines, restart it when it exits."""
+        delay = BACKOFF
+        while not self._stop.is_set():
+            started = monotonic()
+            try:
+                self._process = subprocess.Popen(['sh', '-c', self.cmd],
+                                                 stdout=subprocess.PIPE,
+                                                 stderr=subprocess.DEVNULL,
+                                                 text=True,
+                                                 start_new_session=True)
+            except OSError as err:
+                print(f'{self.util}: {err}', mark='err')
+            else:
+                for line in self._process.stdout:
+                    value = parse_line(line)
+                    if value is not None:
+                        self.latest = value
+                self._process.wait()
+            self.latest = None
+            if self._stop.is_set():
+                return
+            if monotonic() - started > MAX_BACKOFF:
+                delay = BACKOFF
+            print(f'{self.util}: producer exited, restarting in {delay:.0f}s',
+                  mark='warn')
+            self._stop.wait(delay)
+            delay = min(delay * 2, MAX_BACKOFF)
+            self.restarts += 1
+
+    def __call__(self) -> Union[float, bool]:
+        """Latest value, ``False`` (silence) while none is available."""
+        latest = self.latest
+        return False if latest is None else latest
+
+    def stop(self):
+        """Stop producer, do not restart it."""
+        self._stop.set()
+        if self._process is not None and self._process.poll() is None:
+            # whole pipeline of the producer is in its own session
+            os.killpg(self._process.pid, signal.SIGTERM)
+            try:
+                self._process.wait(1)
+            except subprocess.TimeoutExpired:
+                os.killpg(self._process.pid, signal.SIGKILL)
+        self._thread.join(1)
+
+
+def stop_all():
+    """Stop all started producers."""
+    while PRODUCERS:
+        PRODUCERS.pop().stop()
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Recorded traces of probe values.
+
+CSV
+    One record per line: ``timestamp,sensor,value[,outcome]``.
+    A header line is optional.
+
+Binary
+    - Header:
+        - :data:`MAGIC` (8 bytes)
+        - names length (little-endian unsigned 32 bit)
+        - sensor names (utf-8, separated by ``\\n``); sensor id is the index
+    - Records of fixed size, :data:`RECORD`:
+        - timestamp (float 64)
+        - sensor id (unsigned 16 bit)
+        - value (float 64, ``nan`` if probe did not return a value)
+        - outcome (unsigned 8 bit),
+          index in :data:`psprudence.prudence.OUTCOMES`
+
+Binary traces are written append-only by :class:`Recorder`, with
+periodic flushes and size-based rotation. Fixed-size records permit
+random access through a memory map with :class:`TraceReader`.
+"""
+
+import csv
+import mmap
+import os
+import struct
+from math import nan
+from pathlib import Path
+from time import monotonic
+from typing import Any, BinaryIO, Iterator, List, NamedTuple, Tuple, Union
+
+from psprudence.prudence import OUTCOMES
+
+MAGIC = b'PSPTRC\x00\x01'
+"""Leading bytes of binary trace, format version 1."""
+
+NAMES_LEN = struct.Struct('<I')
+"""Length of sensor names table."""
+
+RECORD = struct.Struct('<dHdB')
+"""Layout of binary record: timestamp, sensor id, value, outcome."""
+
+
+class Sample(NamedTuple):
+    """Recorded sample."""
+
+    stamp: float
+    """Time of probe (seconds)."""
+
+    sensor: str
+    """Sensor name."""
+
+    value: Union[float, str]
+    """Probed value."""
+
+    outcome: str = 'quiet'
+    """Recorded outcome."""
+
+
+def read_header(head: bytes) -> Tuple[List[str], int]:
+    """
+    Parse header of binary trace.
+
+    Parameters
+    -----------
+    head : bytes
+        leading bytes of trace, at least the complete header
+
+    Returns
+    --------
+    Tuple[List[str], int]
+        sensor names, header size (offset of first record)
+
+    Raises
+    -------
+    ValueError
+        Not a binary trace
+    """
+    if head[:len(MAGIC)] != MAGIC:
+        raise ValueError('Not a psprudence binary trace')
+    start = len(MAGIC) + NAMES_LEN.size
+    (names_len, ) = NAMES_LEN.unpack_from(head, len(MAGIC))
+    names = head[start:start + names_len].decode().split('\n')
+    return names, start + names_len
+
+
+def write_header(names: List[str]) -> bytes:
+    """
+    Header of binary trace.
+
+    Parameters
+    -----------
+    names : List[str]
+        sensor names, sensor id is the index
+
+    Returns
+    --------
+    bytes
+        header
+    """
+    table = '\n'.join(names).encode()
+    return MAGIC + NAMES_LEN.pack(len(table)) + table
+
+
+class TraceReader():
+    """
+    Random access to records of binary trace through a memory map.
+
+    Parameters
+    -----------
+    path : Path
+        binary trace
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as trace:
+            size = os.fstat(trace.fileno()).st_size
+            self._map = mmap.mmap(trace.fileno(), 0,
+                                  access=mmap.ACCESS_READ) if size else b''
+        self.names, self.offset = read_header(self._map)
+        """Sensor names and offset of first record."""
+
+        self._len = (len(self._map) - self.offset) // RECORD.size
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getitem__(self, index: int) -> Sample:
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError(index)
+        stamp, sensor, value, outcome = RECORD.unpack_from(
+            self._map, self.offset + index * RECORD.size)
+        return Sample(stamp, self.names[sensor], value, OUTCOMES[outcome])
+
+    def __iter__(self) -> Iterator[Sample]:
+        end = self.offset + self._len * RECORD.size
+        with memoryview(self._map)[self.offset:end] as view:
+            for stamp, sensor, value, outcome in RECORD.iter_unpack(view):
+                yield Sample(stamp, self.names[sensor], value,
+                             OUTCOMES[outcome])
+
+    def bisect(self, stamp: float) -> int:
+        """
+        Index of first record at or after ``stamp``.
+
+        Records are assumed to be in chronological order.
+        """
+        low, high = 0, self._len
+        while low < high:
+            mid = (low + high) // 2
+            if RECORD.unpack_from(self._map,
+                                  self.offset + mid * RECORD.size)[0] < stamp:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def close(self):
+        """Release memory map."""
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+
+
+class Recorder():
+    """
+    Append-only binary recording of probe values.
+
+    Parameters
+    -----------
+    path : Path
+        binary trace, rotated traces are suffixed ``.1``, ``.2``, ...
+    names : List[str]
+        sensor names, sensor id is the index
+    flush_every : float
+        seconds between flushes to disk
+    max_size : int
+        bytes after which trace is rotated
+    keep : int
+        rotated traces to keep
+    """
+
+    def __init__(self,
+                 path: Path,
+                 names: List[str],
+                 flush_every: float = 60.,
+                 max_size: int = 16 << 20,
+                 keep: int = 4):
+        self.path = Path(path)
+        self.names = list(names)
+        self.flush_every = flush_every
+        self.max_size = max_size
+        self.keep = keep
+        self._header = write_header(self.names)
+        self._buffer = bytearray()
+        self._flushed = monotonic()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._trace = self._open()
+
+    def _open(self) -> BinaryIO:
+        """Open trace to append, rotate if it was recorded for other names."""
+        if self.path.is_file():
+            with open(self.path, 'rb') as trace:
+                head = trace.read(len(self._header))
+            if head != self._header:
+                self.rotate(reopen=False)
+        trace = open(self.path, 'ab')
+        if trace.tell() == 0:
+            trace.write(self._header)
+        return trace
+
+    def rotate(self, reopen: bool = True):
+        """Shift rotated traces, start a new trace."""
+        if reopen:
+            self._trace.close()
+        for age in range(self.keep - 1, 0, -1):
+            older = self.path.with_name(f'{self.path.name}.{age}')
+            if older.is_file():
+                older.replace(
+                    self.path.with_name(f'{self.path.name}.{age + 1}'))
+        if self.keep:
+            self.path.replace(self.path.with_name(f'{self.path.name}.1'))
+        else:
+            self.path.unlink()
+        if reopen:
+            self._trace = self._open()
+
+    def record(self, stamp: float, sensor: int, value: Any, outcome: int):
+        """
+        Record a sample, flush if due.
+
+        Parameters
+        -----------
+        stamp : float
+            time of probe
+        sensor : int
+            sensor id
+        value : Any
+            probed value, recorded as ``nan`` if not float
+        outcome : int
+            outcome of sensor call
+        """
+        if not isinstance(value, float):
+            value = nan
+        self._buffer += RECORD.pack(stamp, sensor, value, outcome)
+        if monotonic() - self._flushed > self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Write buffered records, rotate whenever trace is full."""
+        data = memoryview(self._buffer)
+        while data:
+            room = self.max_size - self._trace.tell()
+            # split on records; a new trace takes at least one record
+            fit = max(room // RECORD.size,
+                      self._trace.tell() == len(self._header)) * RECORD.size
+            self._trace.write(data[:fit])
+            data = data[fit:]
+            if data:
+                self.rotate()
+        data.release()
+        self._trace.flush()
+        self._buffer.clear()
+        self._flushed = monotonic()
+
+    def close(self):
+        """Flush and close trace."""
+        self.flush()
+        self._trace.close()
+
+
+def read_binary(path: Path) -> Iterator[Sample]:
+    """Read samples from binary trace."""
+    reader = TraceReader(path)
+    try:
+        yield from reader
+    finally:
+        reader.close()
+
+
+def read_csv(path: Path) -> Iterator[Sample]:
+    """Read samples from CSV trace."""
+    with open(path, newline='') as trace:
+        for row in csv.reader(trace):
+            if len(row) < 3:
+                continue
+            try:
+                stamp = float(row[0])
+            except ValueError:
+                continue  # header
+            try:
+                value: Union[float, str] = float(row[2])
+            except ValueError:
+                value = row[2]
+            outcome = row[3].strip() if len(row) > 3 else 'quiet'
+            yield Sample(stamp, row[1].strip(), value, outcome)
+
+
+def read_trace(path: Path) -> Iterator[Sample]:
+    """
+    Read samples from trace, format is identified from content.
+
+    Parameters
+    -----------
+    path : Path
+        binary or CSV trace
+
+    Yields
+    -------
+    Sample
+        recorded samples in recorded order
+    """
+    with open(path, 'rb') as trace:
+        binary = trace.read(len(MAGIC)) == MAGIC
+    return read_binary(path) if binary else read_csv(path)
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Isolated ``py:`` probes.
+
+Probes of sensors configured with ``isolate: true`` run in persistent
+worker processes instead of the monitor's interpreter. A CPU-heavy
+probe then can't hold the monitor's GIL, and a crashing or leaking
+probe takes down only its worker.
+
+Calls do not wait for the worker: each call collects the value computed
+since the previous call and requests the next one. The sensor reports
+its latest value while the worker is busy, and is silenced until the
+first value arrives.
+
+Each probe is pinned to a worker of a small pool, which imports the
+probe once and keeps it. Requests and replies are :mod:`marshal`-ed
+tuples over a pipe:
+
+- request: (operation, source string, util)
+- reply: (success, value or error, worker's resident memory in bytes)
+
+A worker is recycled after ``max_calls`` calls or once its resident
+memory exceeds ``max_rss``; a worker that dies or does not reply within
+``timeout`` seconds is replaced.
+
+Pool is configured in ``global`` configuration:
+
+.. code-block:: yaml
+
+   global:
+     workers:
+       size: 2
+       max_calls: 10000
+       max_rss: 128  # MiB
+       timeout: 30  # seconds
+"""
+
+import marshal
+import multiprocessing
+from collections import deque
+from functools import lru_cache
+from multiprocessing.connection import Connection
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from psprudence import print
+from psprudence.errors import WorkerError
+from psprudence.overhead import rss
+
+BUILD, CALL = range(2)
+"""Request operations."""
+
+POOL_OPTS: Dict[str, Any] = {}
+"""Keyword arguments for the shared :class:`WorkerPool`."""
+
+
+def _serve(conn: Connection):
+    """Worker process: build and call probes on request, until EOF."""
+    from psprudence.build_meth import build_py_handle
+    handles: Dict[str, Callable[[], Any]] = {}
+    while True:
+        try:
+            operation, srcstr, util = marshal.loads(conn.recv_bytes())
+        except (EOFError, OSError):
+            return
+        try:
+            if srcstr not in handles:
+                handles[srcstr] = build_py_handle(srcstr, util)
+            value = None
+            if operation == CALL:
+                value = handles[srcstr]()
+                if not isinstance(value, (type(None), bool, int, float, str)):
+                    value = str(value)
+            reply: Tuple[bool, Any, int] = (True, value, rss())
+        except Exception as err:  # report every failure to monitor
+            reply = (False, f'{type(err).__name__}: {err}', rss())
+        conn.send_bytes(marshal.dumps(reply))
+
+
+class Worker():
+    """
+    A worker process and its pipe.
+
+    Parameters
+    -----------
+    context : multiprocessing.context.BaseContext
+        process start method
+    """
+
+    __slots__ = ('process', 'conn', 'calls', 'rss', 'queue')
+
+    def __init__(self, context):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_serve,
+                                       args=(child, ),
+                                       name='psprudence-worker',
+                                       daemon=True)
+        self.process.start()
+        child.close()
+
+        self.calls = 0
+        """Requests served."""
+
+        self.rss = 0
+        """Resident memory (bytes) at latest reply."""
+
+        self.queue: Deque[Tuple[str, float]] = deque()
+        """(source string, time sent) of requests awaiting reply."""
+
+    def send(self, operation: int, srcstr: str, util: str):
+        """
+        Send request without waiting for reply.
+
+        Raises
+        -------
+        WorkerError
+            worker died
+        """
+        try:
+            self.conn.send_bytes(marshal.dumps((operation, srcstr, util)))
+        except OSError as err:
+            raise WorkerError(f'worker died: {err}') from err
+        self.queue.append((srcstr, monotonic()))
+
+    def receive(self, timeout: float = 0.) -> Optional[Tuple[str, bool, Any]]:
+        """
+        Receive the reply to the oldest request.
+
+        Parameters
+        -----------
+        timeout : float
+            seconds to wait for it
+
+        Returns
+        --------
+        Tuple[str, bool, Any]
+            source string, success, value or error
+        ``None``
+            no reply arrived in time
+
+        Raises
+        -------
+        WorkerError
+            worker died
+        """
+        try:
+            if not self.conn.poll(timeout):
+                return None
+            success, value, self.rss = marshal.loads(self.conn.recv_bytes())
+        except (EOFError, OSError) as err:
+            raise WorkerError(f'worker died: {err}') from err
+        self.calls += 1
+        return self.queue.popleft()[0], success, value
+
+    def stop(self):
+        """Stop worker process."""
+        self.conn.close()
+        self.process.terminate()
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+
+
+class WorkerPool():
+    """
+    Persistent worker processes for isolated probes.
+
+    Parameters
+    -----------
+    size : int
+        worker processes
+    max_calls : int
+        recycle worker after these many calls
+    max_rss : float
+        recycle worker when its resident memory exceeds these many MiB
+    timeout : float
+        seconds to wait for a reply, after which worker is killed
+    """
+
+    def __init__(self,
+                 size: int = 2,
+                 max_calls: int = 10000,
+                 max_rss: float = 128,
+                 timeout: float = 30.):
+        self.size = max(1, size)
+        self.max_calls = max_calls
+        self.max_rss = max_rss * (1 << 20)
+        self.timeout = timeout
+        self._context = multiprocessing.get_context('spawn')
+        self._workers: List[Optional[Worker]] = [None] * self.size
+        self._locks = [Lock() for _ in range(self.size)]
+        self._slots: Dict[str, int] = {}
+        self._results: Dict[str, Tuple[bool, Any]] = {}
+        self.recycled = 0
+        """Workers recycled or replaced so far."""
+
+    def _slot(self, srcstr: str) -> int:
+        """Pin probe to a worker, round-robin."""
+        if srcstr not in self._slots:
+            self._slots[srcstr] = len(self._slots) % self.size
+        return self._slots[srcstr]
+
+    def _worker(self, slot: int) -> Worker:
+        """Worker in slot, started if necessary."""
+        worker = self._workers[slot]
+        if worker is None:
+            worker = self._workers[slot] = Worker(self._context)
+        return worker
+
+    def _retire(self, slot: int):
+        """Stop worker in slot, next request starts a new one."""
+        worker = self._workers[slot]
+        if worker is not None:
+            worker.stop()
+            self._workers[slot] = None
+            self.recycled += 1
+
+    def _recycle(self, slot: int):
+        """Retire idle worker that served enough or grew too large."""
+        worker = self._workers[slot]
+        if worker is None or worker.queue:
+            return
+        if worker.calls >= self.max_calls or worker.rss > self.max_rss:
+            self._retire(slot)
+
+    def request(self, operation: int, srcstr: str,
+                util: str) -> Tuple[bool, Any]:
+        """
+        Serve request by the worker pinned to the probe, wait for reply.
+
+        Returns
+        --------
+        Tuple[bool, Any]
+            success, value or error
+
+        Raises
+        -------
+        WorkerError
+            worker died or did not reply in time, it is replaced
+        """
+        slot = self._slot(srcstr)
+        with self._locks[slot]:
+            worker = self._worker(slot)
+            try:
+                worker.send(operation, srcstr, util)
+                while True:
+                    reply = worker.receive(self.timeout)
+                    if reply is None:
+                        raise WorkerError(
+                            f'no reply from worker in {self.timeout}s')
+                    if not worker.queue:
+                        break  # reply to this request
+                    # reply to an earlier call
+                    self._results[reply[0]] = reply[1:]
+            except WorkerError:
+                self._retire(slot)
+                raise
+            self._recycle(slot)
+            return reply[1:]
+
+    def call(self, srcstr: str, util: str) -> Optional[Tuple[bool, Any]]:
+        """
+        Collect reply to the previous call of probe, request the next one.
+
+        Never waits for the worker.
+
+        Returns
+        --------
+        Tuple[bool, Any]
+            success, value or error of the previous call
+        ``None``
+            previous call is not yet served
+
+        Raises
+        -------
+        WorkerError
+            worker died or did not reply in time, it is replaced
+        """
+        slot = self._slot(srcstr)
+        with self._locks[slot]:
+            worker = self._worker(slot)
+            try:
+                while worker.queue:
+                    reply = worker.receive()
+                    if reply is None:
+                        break
+                    self._results[reply[0]] = reply[1:]
+                if worker.queue and (monotonic() - worker.queue[0][1] >
+                                     self.timeout):
+                    raise WorkerError(
+                        f'no reply from worker in {self.timeout}s')
+                if any(name == srcstr for name, _ in worker.queue):
+                    return None
+                result = self._results.pop(srcstr, None)
+                self._recycle(slot)
+                self._worker(slot).send(CALL, srcstr, util)
+            except WorkerError:
+                self._retire(slot)
+                raise
+            return result
+
+    def close(self):
+        """Stop all workers."""
+        for slot in range(self.size):
+            with self._locks[slot]:
+                self._retire(slot)
+
+
+@lru_cache(maxsize=None)
+def worker_pool() -> WorkerPool:
+    """Shared pool, started on first use with :data:`POOL_OPTS`."""
+    return WorkerPool(**POOL_OPTS)
+
+
+def close_pool():
+    """Stop shared pool, if it was started."""
+    if worker_pool.cache_info().currsize:
+        worker_pool().close()
+        worker_pool.cache_clear()
+
+
+def build_isolated_handle(
+        srcstr: str,
+        util: str = 'UNKNOWN') -> Callable[[], Optional[Any]]:
+    """
+    Parse string and return handle that calls python probe in a worker.
+
+    The probe is imported in its worker right away, to report failures.
+
+    Parameters
+    -----------
+    srcstr : str
+        py: /absolute/path/to/py_file:func_name:arg1:arg2:...
+    util : str
+        name object that uses this constructor (used to elaborate debug)
+
+    Returns
+    --------
+    Callable[[], Optional[Any]]
+        Handle to probe. Returns the latest value computed by the worker
+        (``False``, silenced, until the first one), ``None`` (disables
+        sensor) if the probe raised an error, ``False`` if the worker
+        died or timed out.
+
+    Raises
+    -------
+    WorkerError
+        probe could not be imported in worker
+    """
+    pool = worker_pool()
+    success, err = pool.request(BUILD, srcstr, util)
+    if not success:
+        print(f'Error creating isolated py-callable handle for {util}',
+              mark='err')
+        raise WorkerError(err)
+
+    latest: List[Any] = [False]
+
+    def isofunc():
+        try:
+            reply = pool.call(srcstr, util)
+        except WorkerError as err:
+            print(f'{util}: {err}', mark='warn')
+            return False
+        if reply is None:
+            # worker is still busy with the previous call
+            return latest[0]
+        success, value = reply
+        if success:
+            latest[0] = value
+            return value
+        print(f'{util}: {value}', mark='err')
+        return None
+
+    isofunc.__doc__ = f"""Isolated python function: {util}"""
+    return isofunc
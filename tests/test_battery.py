@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Test battery state read from sysfs.
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from psprudence.battery import PowerSupply
+
+
+class TestPowerSupply(unittest.TestCase):
+    """Polled power supply on a fake sysfs tree."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmpdir.name)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def supply(self, name: str, **props: str):
+        supply_dir = self.root / name
+        supply_dir.mkdir(exist_ok=True)
+        (supply_dir / 'uevent').write_text(''.join(
+            f'POWER_SUPPLY_{key.upper()}={value}\n'
+            for key, value in props.items()))
+
+    def test_no_battery(self):
+        self.supply('AC', type='Mains', online='1')
+        supply = PowerSupply(root=self.root, listen=False)
+        self.assertFalse(supply.listening)
+        self.assertEqual(supply.state(), (None, True))
+
+    def test_mains(self):
+        self.supply('AC', type='Mains', online='1')
+        self.supply('BAT0', type='Battery', status='Charging', capacity='40')
+        supply = PowerSupply(root=self.root, listen=False)
+        self.assertEqual(supply.state(), (40., True))
+        # polled: changes are read on next state
+        self.supply('AC', type='Mains', online='0')
+        self.supply('BAT0', type='Battery', status='Discharging',
+                    capacity='39')
+        self.assertEqual(supply.state(), (39., False))
+
+    def test_batteries_without_mains(self):
+        self.supply('BAT0', type='Battery', status='Full', capacity='100')
+        self.supply('BAT1', type='Battery', status='Discharging',
+                    capacity='50')
+        supply = PowerSupply(root=self.root, listen=False)
+        self.assertEqual(supply.state(), (75., False))
+
+    def test_bad_capacity(self):
+        self.supply('BAT0', type='Battery', status='Unknown', capacity='')
+        supply = PowerSupply(root=self.root, listen=False)
+        self.assertEqual(supply.state(), (None, True))
+
+    def test_missing_root(self):
+        supply = PowerSupply(root=self.root / 'missing', listen=False)
+        self.assertEqual(supply.supplies, {})
+        self.assertEqual(supply.state(), (None, True))
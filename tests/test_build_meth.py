@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Test probe sharing.
+"""
+
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from time import sleep
+from unittest import mock
+
+from psprudence import build_meth, clock, events
+from psprudence.build_meth import (SHARED_PROBES, SharedProbe,
+                                   build_probe_handle, probe_key)
+
+
+class Counter():
+    """Probe that counts its calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self) -> float:
+        self.calls += 1
+        return float(self.calls)
+
+
+class TickTestCase(unittest.TestCase):
+    """Run outside the monitoring loop's tick numbers."""
+
+    def setUp(self):
+        self.tick = events.current_tick()
+        events._TICKS[0] = 0
+        self.clock = clock.SimulatedClock(100.)
+        clock.use(self.clock)
+
+    def tearDown(self):
+        events._TICKS[0] = self.tick
+        clock.use()
+
+
+class TestSharedProbe(TickTestCase):
+    """Calls of a shared probe."""
+
+    def test_once_per_tick(self):
+        probe = Counter()
+        shared = SharedProbe(probe)
+        events.next_tick()
+        self.assertEqual([shared.get() for _ in range(3)], [1., 1., 1.])
+        events.next_tick()
+        self.assertEqual([shared.get() for _ in range(3)], [2., 2., 2.])
+        self.assertEqual(shared.calls, probe.calls)
+        self.assertEqual(shared.calls, 2)
+
+    def test_outside_loop(self):
+        """Tick 0: nothing is shared."""
+        shared = SharedProbe(Counter())
+        self.assertEqual([shared.get() for _ in range(3)], [1., 2., 3.])
+
+    def test_ttl(self):
+        shared = SharedProbe(Counter())
+        values = []
+        for stamp in (0., 3., 4.9, 5., 7., 10.5):
+            self.clock.stamp = 100. + stamp
+            events.next_tick()
+            values.append(shared.get(ttl=5))
+            # reused within the tick, whatever the ttl
+            self.assertEqual(shared.get(), values[-1])
+        self.assertEqual(values, [1., 1., 1., 2., 2., 3.])
+
+    def test_ttl_outside_loop(self):
+        shared = SharedProbe(Counter())
+        self.assertEqual([shared.get(ttl=5) for _ in range(3)], [1., 1., 1.])
+        self.clock.stamp += 5
+        self.assertEqual(shared.get(ttl=5), 2.)
+
+
+class TestBuildShared(TickTestCase):
+    """Sensors with identical probes share one handle."""
+
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.module = Path(self.tmpdir.name) / 'psp_probe_mod.py'
+        self.module.write_text('CALLS = []\n\n\n'
+                               'def probe(*args):\n'
+                               '    CALLS.append(args)\n'
+                               '    return float(len(CALLS))\n')
+        self.keys = set(SHARED_PROBES)
+
+    def tearDown(self):
+        for key in set(SHARED_PROBES) - self.keys:
+            del SHARED_PROBES[key]
+        self.tmpdir.cleanup()
+        super().tearDown()
+
+    def test_probe_key(self):
+        base = str(self.module.with_suffix(''))
+        self.assertEqual(probe_key(f'py: {self.module}: probe :1'),
+                         ('py', base, 'probe', '1'))
+        self.assertEqual(probe_key(f'py: {base}:probe:1', isolate=True),
+                         ('isolated py', base, 'probe', '1'))
+        self.assertEqual(probe_key('stream:  top -b '), ('stream', 'top -b'))
+        self.assertEqual(probe_key(' echo 1 '), ('otf', 'echo 1'))
+
+    def test_shared(self):
+        first = build_probe_handle(f'py: {self.module}:probe:a', 'first')
+        second = build_probe_handle(
+            f'py: {self.module.with_suffix("")} :probe: a', 'second')
+        other = build_probe_handle(f'py: {self.module}:probe:b', 'other')
+        shared = SHARED_PROBES[('py', str(self.module.with_suffix('')),
+                                'probe', 'a')]
+        self.assertEqual(shared.users, 2)
+        events.next_tick()
+        self.assertEqual((first(), second(), other()), (1., 1., 2.))
+        events.next_tick()
+        self.assertEqual((first(), second(), other()), (3., 3., 4.))
+        self.assertEqual(shared.calls, 2)
+
+    def test_built_once(self):
+        """Concurrent builds of a probe build its handle once."""
+        built = []
+
+        def build(srcstr, util, isolate):
+            built.append(util)
+            sleep(0.05)
+            return Counter()
+
+        with mock.patch.object(build_meth, 'build_func_handle', build):
+            threads = [
+                threading.Thread(target=build_probe_handle,
+                                 args=('echo 1', f'sensor {idx}'))
+                for idx in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(built), 1)
+        self.assertEqual(SHARED_PROBES[('otf', 'echo 1')].users, 4)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Test built-in alert_check modes.
+"""
+
+import random
+import unittest
+from statistics import fmean, pvariance
+from types import SimpleNamespace
+
+from psprudence import clock
+from psprudence.checks import (FIRING, OK, PENDING, RECOVERING, Anomaly,
+                               Debounce, Forecast)
+from psprudence.errors import CheckModeError
+
+
+def sensor(min_warn: float = 80., warn_res: float = 5., reverse=False):
+    """Sensor configuration read by checks."""
+    return SimpleNamespace(min_warn=min_warn,
+                           warn_res=warn_res,
+                           reverse=reverse,
+                           units='%')
+
+
+class TestDebounce(unittest.TestCase):
+    """Debounce state machine."""
+
+    def feed(self, check, parent, values):
+        return [(check(parent, val), check.state) for val in values]
+
+    def test_transitions(self):
+        check = Debounce(breaches=3, samples=5, clear_warn=70)
+        parent = sensor()
+        self.assertEqual(
+            self.feed(check, parent, (50, 85, 85, 50, 85, 88, 91, 75)),
+            [(False, OK), (False, PENDING), (False, PENDING),
+             (False, PENDING), (True, FIRING), (False, FIRING),
+             (True, FIRING), (False, FIRING)])
+        self.assertEqual(
+            self.feed(check, parent, (65, 65, 85, 65, 65, 65)),
+            [(False, RECOVERING), (False, RECOVERING), (False, FIRING),
+             (False, RECOVERING), (False, RECOVERING), (False, OK)])
+
+    def test_pending_clears(self):
+        check = Debounce(breaches=3, samples=5)
+        results = self.feed(check, sensor(), (85, 50, 50, 50, 50, 50))
+        self.assertEqual([state for _, state in results],
+                         [PENDING] * 5 + [OK])
+        self.assertFalse(any(alert for alert, _ in results))
+
+    def test_reverse(self):
+        check = Debounce(breaches=2, samples=2)
+        parent = sensor(min_warn=20, reverse=True)
+        self.assertEqual(self.feed(check, parent, (50, 10, 10, 8, 4)),
+                         [(False, OK), (False, PENDING), (True, FIRING),
+                          (False, FIRING), (True, FIRING)])
+
+    def test_bad_window(self):
+        with self.assertRaises(CheckModeError):
+            Debounce(breaches=0)
+        with self.assertRaises(CheckModeError):
+            Debounce(breaches=6, samples=5)
+
+
+class TestAnomaly(unittest.TestCase):
+    """Running z-score alerts."""
+
+    def test_transitions(self):
+        check = Anomaly(threshold=3, alpha=0, warmup=10, min_std=1)
+        parent = sensor()
+        # unusual values are not flagged before warmup
+        self.assertFalse(check(parent, 1000.))
+        check = Anomaly(threshold=3, alpha=0, warmup=10, min_std=1)
+        for idx in range(10):
+            self.assertFalse(check(parent, 49. + 2 * (idx % 2)))
+        self.assertTrue(check(parent, 60.))
+        self.assertTrue(check.firing)
+        # still unusual, but not escalated by warn_res
+        self.assertFalse(check(parent, 61.))
+        self.assertTrue(check.firing)
+        self.assertTrue(check(parent, 70.))
+        self.assertFalse(check(parent, 50.))
+        self.assertFalse(check.firing)
+        # below mean is usual, unless reversed
+        self.assertFalse(check(parent, 0.))
+        self.assertTrue(check(sensor(reverse=True), -100.))
+
+    def test_welford(self):
+        rng = random.Random(4)
+        values = [rng.gauss(50, 10) for _ in range(200)]
+        check = Anomaly(alpha=0)
+        for val in values:
+            check.update(val)
+        self.assertAlmostEqual(check.mean, fmean(values))
+        self.assertAlmostEqual(check.var, pvariance(values))
+
+    def test_ewma(self):
+        alpha = 0.1
+        check = Anomaly(alpha=alpha)
+        mean, var = 10., 0.
+        check.update(mean)
+        for val in (12., 8., 15., 11., 9.):
+            check.update(val)
+            diff = val - mean
+            mean += alpha * diff
+            var = (1 - alpha) * (var + alpha * diff * diff)
+            self.assertAlmostEqual(check.mean, mean)
+            self.assertAlmostEqual(check.var, var)
+
+    def test_bad_parameters(self):
+        with self.assertRaises(CheckModeError):
+            Anomaly(threshold=0)
+        with self.assertRaises(CheckModeError):
+            Anomaly(alpha=1)
+
+
+class TestForecast(unittest.TestCase):
+    """Projected threshold crossing."""
+
+    def setUp(self):
+        self.clock = clock.SimulatedClock(0.)
+        clock.use(self.clock)
+
+    def tearDown(self):
+        clock.use()
+
+    def test_sums(self):
+        """Incremental fit matches a fit over the samples in window."""
+        rng = random.Random(7)
+        check = Forecast(window=60, min_samples=2)
+        stamp = 1e6  # far from origin
+        points = []
+        for _ in range(300):
+            stamp += rng.uniform(0.5, 5)
+            val = 0.3 * stamp + rng.gauss(0, 5)
+            check.update(val, stamp)
+            points.append((stamp, val))
+            window = [(t - stamp, x) for t, x in points if t >= stamp - 60]
+            self.assertEqual(len(window), len(check.samples))
+            trend = check.trend()
+            if len(window) < 2:
+                self.assertIsNone(trend)
+                continue
+            mean_t = fmean(t for t, _ in window)
+            mean_x = fmean(x for _, x in window)
+            slope = sum((t - mean_t) * (x - mean_x) for t, x in window) / sum(
+                (t - mean_t)**2 for t, _ in window)
+            self.assertAlmostEqual(trend[1], slope, places=6)
+            self.assertAlmostEqual(trend[0], mean_x - slope * mean_t, places=4)
+
+    def test_too_few(self):
+        check = Forecast(min_samples=5)
+        for stamp in range(4):
+            check.update(float(stamp), float(stamp))
+        self.assertIsNone(check.trend())
+        self.assertIsNone(check.eta(100))
+        check.update(4., 4.)
+        self.assertAlmostEqual(check.eta(100), 96)
+        self.assertIsNone(check.eta(0))
+
+    def test_alerts(self):
+        check = Forecast(horizon=10, window=300, min_samples=5)
+        parent = sensor(min_warn=700, warn_res=50)
+        alerts = {}
+        for stamp in range(800):
+            self.clock.stamp = float(stamp)
+            alert = check(parent, float(stamp))
+            if alert:
+                alerts[stamp] = alert
+        # eta within 10 min, then each time it halves, down to 2 min
+        self.assertEqual(list(alerts)[:4], [100, 400, 550, 625])
+        self.assertEqual(alerts[100], 'reaches 700% in 10 min')
+        self.assertEqual(alerts[625], 'reaches 700% in 1 min')
+        # beyond min_warn: escalates by warn_res
+        self.assertEqual(list(alerts)[4:], [701, 752])
+        self.assertIs(alerts[701], True)
+
+    def test_bad_parameters(self):
+        with self.assertRaises(CheckModeError):
+            Forecast(horizon=0)
+        with self.assertRaises(CheckModeError):
+            Forecast(min_samples=1)
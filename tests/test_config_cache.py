@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Test cache of merged configuration.
+"""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from psprudence import config_cache
+from psprudence.config_cache import cache_key, load, store
+
+
+class TestConfigCache(unittest.TestCase):
+    """Cache is stale whenever any candidate file changes."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        root = Path(self.tmpdir.name)
+        self.system = root / 'system.yml'
+        self.user = root / 'user.yml'
+        self.system.write_text('cpu:\n  min_warn: 80\n')
+        self.sources = [self.system, self.user]
+        self.cache = root / 'cache' / 'config.marshal'
+        patcher = mock.patch.object(config_cache,
+                                    'cache_path',
+                                    return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def touch(self, path: Path, mtime_ns: int):
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+    def test_unchanged(self):
+        self.assertEqual(cache_key(self.sources), cache_key(self.sources))
+
+    def test_mtime(self):
+        self.touch(self.system, 10**18)
+        key = cache_key(self.sources)
+        self.touch(self.system, 10**18 + 1)
+        self.assertNotEqual(cache_key(self.sources), key)
+
+    def test_size(self):
+        stat = self.system.stat()
+        key = cache_key(self.sources)
+        self.system.write_text('cpu:\n  min_warn: 90.\n')
+        self.touch(self.system, stat.st_mtime_ns)
+        self.assertNotEqual(cache_key(self.sources), key)
+
+    def test_created_removed(self):
+        key = cache_key(self.sources)
+        self.user.write_text('')
+        created = cache_key(self.sources)
+        self.assertNotEqual(created, key)
+        self.user.unlink()
+        self.assertEqual(cache_key(self.sources), key)
+        self.system.unlink()
+        self.assertNotEqual(cache_key(self.sources), key)
+
+    def test_round_trip(self):
+        config = {'cpu': {'min_warn': 80, 'probe': 'py: sensors:cpu'}}
+        self.assertIsNone(load(self.sources))
+        store(self.sources, config)
+        self.assertEqual(load(self.sources), config)
+        self.user.write_text('cpu:\n  enabled: false\n')
+        self.assertIsNone(load(self.sources))
+
+    def test_corrupt(self):
+        self.cache.parent.mkdir(parents=True)
+        self.cache.write_bytes(b'not marshal')
+        self.assertIsNone(load(self.sources))
+
+    def test_unmarshallable(self):
+        store(self.sources, {'cpu': {'probe': object()}})
+        self.assertFalse(self.cache.exists())
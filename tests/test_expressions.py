@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Test threshold expressions.
+"""
+
+import unittest
+from types import SimpleNamespace
+
+from psprudence import clock
+from psprudence.errors import ExpressionError
+from psprudence.expressions import compile_expression
+
+
+class TestValidation(unittest.TestCase):
+    """Expressions outside the permitted subset are rejected."""
+
+    def assertRejected(self, source: str, message: str):
+        with self.assertRaises(ExpressionError) as raised:
+            compile_expression(source, 'test')
+        self.assertIn(message, str(raised.exception))
+
+    def test_permitted(self):
+        for source in ('val > 90', 'val > 90 and rate(30) > 2',
+                       'abs(val - ago(60)) > warn_res',
+                       'max(val, mean(10), 3) >= min_warn',
+                       'not (low(5) < 1 if val else high(5.5) > 2)'):
+            compile_expression(source, 'test')
+
+    def test_syntax(self):
+        self.assertRejected('val >', 'test:')
+
+    def test_names(self):
+        self.assertRejected('value > 90', 'Unknown name: value')
+        self.assertRejected('__import__("os")', 'Unknown function')
+        self.assertRejected('open(1)', 'Unknown function: open')
+
+    def test_uncalled_functions(self):
+        self.assertRejected('abs', 'abs must be called')
+        self.assertRejected('rate > 1', 'rate must be called')
+        self.assertRejected('max(abs, val)', 'abs must be called')
+
+    def test_arity(self):
+        self.assertRejected('abs(val, 1)', 'abs() takes 1 argument(s)')
+        self.assertRejected('min(val) > 1', 'min() takes 2 or more')
+        self.assertRejected('max()', 'max() takes 2 or more')
+
+    def test_windows(self):
+        self.assertRejected('rate(val) > 1', 'rate(secs)')
+        self.assertRejected('mean(30, 60) > 1', 'mean(secs)')
+        self.assertRejected('high() > 1', 'high(secs)')
+
+    def test_syntax_subset(self):
+        self.assertRejected('val.real > 1', 'Attribute')
+        self.assertRejected('"val" == val', 'Bad constant')
+        self.assertRejected('[val][0]', 'Subscript')
+        self.assertRejected('(lambda: 1)()', 'Only positional calls')
+        self.assertRejected('max(val, 1, key=abs)', 'Only positional calls')
+
+    def test_powers(self):
+        compile_expression('val ** 2 + val ** -0.5 > 10', 'test')
+        self.assertRejected('10 ** 10 ** 10 > val', 'Exponents must be')
+        self.assertRejected('2 ** val > 1', 'Exponents must be')
+        self.assertRejected('val ** 11 > 1', 'Exponents must be')
+        self.assertRejected('(val ** 10) ** 10 > 1', 'Powers of powers')
+
+
+class TestEvaluation(unittest.TestCase):
+    """Compiled expressions read history of values."""
+
+    def setUp(self):
+        self.clock = clock.SimulatedClock(0.)
+        clock.use(self.clock)
+        self.parent = SimpleNamespace(min_warn=80., warn_res=5.)
+
+    def tearDown(self):
+        clock.use()
+
+    def test_rate(self):
+        check = compile_expression('val > min_warn - 20 and rate(10) > 2')
+        results = []
+        for stamp, val in enumerate((50., 55., 60., 62., 70., 71.)):
+            self.clock.stamp = float(stamp)
+            results.append(check(self.parent, val))
+        self.assertEqual(results, [False, False, False, True, True, True])
+
+    def test_arithmetic_error(self):
+        check = compile_expression(
+            '(val - mean(60)) / (high(60) - low(60)) > 0.5')
+        results = []
+        for stamp, val in enumerate((50., 50., 50., 52., 60.)):
+            self.clock.stamp = float(stamp)
+            results.append(check(self.parent, val))
+        # flat window divides by zero
+        self.assertEqual(results, [False, False, False, True, True])
+        self.assertFalse(
+            compile_expression('val ** -1 > 1')(self.parent, 0.))
+
+    def test_history_span(self):
+        check = compile_expression('ago(3) < val - warn_res')
+        results = []
+        for stamp in range(8):
+            self.clock.stamp = float(stamp)
+            results.append(check(self.parent, float(stamp * 2)))
+        # oldest retained value is at most 3 s old
+        self.assertEqual(results, [False, False, False, True, True, True,
+                                   True, True])
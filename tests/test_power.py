@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Test power-aware scheduling profiles.
+"""
+
+import unittest
+from types import SimpleNamespace
+
+from psprudence.power import PowerProfiles
+from psprudence.prudence import QUIET, SILENCED, Prudence
+
+NAMES = ('discharge', 'cpu', 'top_process', 'memory')
+
+
+class TestPowerProfiles(unittest.TestCase):
+    """Profile switches and ``max_cost`` skips."""
+
+    def setUp(self):
+        self.sensors = {name: Prudence(name, 80, 'echo 1') for name in NAMES}
+        self.power = PowerProfiles(self.sensors,
+                                   1.,
+                                   battery={
+                                       'interval': 30,
+                                       'max_cost': 5,
+                                       'disable': ['memory']
+                                   })
+
+    def plug(self, plugged: bool):
+        discharge = self.sensors['discharge']
+        discharge.value = False if plugged else 50.
+        discharge.outcome = SILENCED if plugged else QUIET
+
+    @staticmethod
+    def overhead(cost_ms, calls):
+        """Overhead of a closed window."""
+        return SimpleNamespace(last=([ms / 1000 for ms in cost_ms], calls))
+
+    def test_switch(self):
+        self.plug(True)
+        self.assertFalse(self.power.update())
+        self.assertEqual(self.power.profile, 'ac')
+        self.plug(False)
+        self.assertTrue(self.power.update())
+        self.assertEqual(self.power.profile, 'battery')
+        self.assertEqual(self.power.interval_now, 30)
+        self.assertEqual(self.power.skip, [False, False, False, True])
+        self.plug(True)
+        self.assertTrue(self.power.update())
+        self.assertEqual(self.power.skip, [False] * 4)
+
+    def test_max_cost_before_first_window(self):
+        """Unplugged before a window closed: skip once one closes."""
+        empty = SimpleNamespace(last=([], []))
+        self.plug(False)
+        self.assertTrue(self.power.update(empty))
+        self.assertEqual(self.power.skip, [False, False, False, True])
+        window = self.overhead([1, 20, 100, 2], [10, 10, 10, 10])
+        self.assertFalse(self.power.update(window, closed=False))
+        self.assertEqual(self.power.skip, [False, False, False, True])
+        self.assertFalse(self.power.update(window, closed=True))
+        self.assertEqual(self.power.skip, [False, False, True, True])
+
+    def test_max_cost_follows_costs(self):
+        self.plug(False)
+        self.power.update(self.overhead([1, 20, 100, 2], [10, 10, 10, 10]))
+        self.assertEqual(self.power.skip, [False, False, True, True])
+        # cpu got costlier; skipped sensors keep their cost
+        self.power.update(self.overhead([1, 80, 0, 0], [10, 10, 0, 0]),
+                          closed=True)
+        self.assertEqual(self.power.skip, [False, True, True, True])
+        # plug state is read in every profile, however costly
+        self.power.update(self.overhead([90, 0, 0, 0], [10, 0, 0, 0]),
+                          closed=True)
+        self.assertFalse(self.power.skip[0])
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Test Prudence sensor calls.
+"""
+
+import unittest
+
+from psprudence.prudence import ALERT, QUIET, Prudence
+
+
+def counting_check(parent, val: float) -> bool:
+    """Custom alert_check that keeps state on the sensor."""
+    parent.state['count'] = parent.state.get('count', 0) + 1
+    return parent.state['count'] % 2 == 0 and val > parent.min_warn
+
+
+class TestPrudence(unittest.TestCase):
+    """Frozen calls of a sensor."""
+
+    def test_custom_state(self):
+        values = iter((90., 90., 50., 95.))
+        sensor = Prudence('load',
+                          80,
+                          lambda: next(values),
+                          alert_check=counting_check,
+                          attempt_reset=lambda parent, val: None)
+        outcomes = []
+        for _ in range(4):
+            sensor()
+            outcomes.append(sensor.outcome)
+        self.assertEqual(sensor.state, {'count': 4})
+        self.assertEqual(outcomes, [QUIET, ALERT, QUIET, ALERT])
+
+    def test_fixed_attributes(self):
+        sensor = Prudence('load', 80, lambda: 1.)
+        with self.assertRaises(AttributeError):
+            sensor.count = 1
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Test service manager notification.
+"""
+
+import socket
+import tempfile
+import unittest
+from pathlib import Path
+
+from psprudence.sdnotify import Notifier
+
+
+class TestNotifier(unittest.TestCase):
+    """Notifier against a bound datagram socket."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.address = str(Path(self.tmpdir.name) / 'notify')
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.server.bind(self.address)
+        self.server.settimeout(1)
+
+    def tearDown(self):
+        self.server.close()
+        self.tmpdir.cleanup()
+
+    def received(self):
+        return self.server.recv(4096).decode().split('\n')
+
+    def test_disabled(self):
+        notifier = Notifier(address='', watchdog=None)
+        self.assertFalse(notifier.enabled)
+        self.assertFalse(notifier.ready())
+        self.assertFalse(notifier.heartbeat('idle'))
+        self.assertFalse(notifier.stopping())
+
+    def test_ready(self):
+        notifier = Notifier(address=self.address, watchdog=None)
+        self.assertTrue(notifier.enabled)
+        self.assertTrue(notifier.ready('3 sensors'))
+        self.assertEqual(self.received(), ['READY=1', 'STATUS=3 sensors'])
+
+    def test_heartbeat(self):
+        notifier = Notifier(address=self.address, watchdog=60)
+        self.assertEqual(notifier.period, 30)
+        self.assertTrue(notifier.heartbeat('tick 2 ms'))
+        self.assertEqual(self.received(), ['STATUS=tick 2 ms', 'WATCHDOG=1'])
+        # not due again before half the watchdog timeout
+        self.assertFalse(notifier.heartbeat('tick 2 ms'))
+
+    def test_stopping(self):
+        notifier = Notifier(address=self.address, watchdog=None)
+        self.assertTrue(notifier.stopping())
+        self.assertEqual(self.received(), ['STOPPING=1'])
+        self.assertFalse(notifier.enabled)
+
+    def test_unreachable(self):
+        notifier = Notifier(address=self.address + '.missing', watchdog=None)
+        self.assertFalse(notifier.ready())
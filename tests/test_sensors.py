@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Test probe templates.
+"""
+
+import unittest
+
+from psprudence import sensors
+
+
+class TestMetrics(unittest.TestCase):
+    """An unknown metric disables its sensor instead of raising."""
+
+    def test_disk_io(self):
+        for _ in range(2):  # also once a previous sample exists
+            self.assertIsNone(sensors.disk_io('*', 'bogus'))
+        for metric in sensors.DISK_METRICS:
+            self.assertIsNot(sensors.disk_io('*', metric), None)
+
+    def test_network(self):
+        for _ in range(2):
+            self.assertIsNone(sensors.network('*', 'bogus'))
+        for metric in sensors.NET_METRICS:
+            self.assertIsNot(sensors.network('*', metric), None)
+
+    def test_cgroup_cpu(self):
+        self.assertIsNone(sensors.cgroup_cpu('user.slice', 'bogus'))
+
+
+class TestTemplates(unittest.TestCase):
+    """Public functions of the probe template return probe values."""
+
+    def test_top_process(self):
+        for _ in range(2):
+            value = sensors.top_process('1')
+            self.assertTrue(value is False or isinstance(value, float))
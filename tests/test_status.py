@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Test shared-memory status segment.
+"""
+
+import tempfile
+import threading
+import unittest
+from math import isnan
+from pathlib import Path
+from time import sleep
+
+from psprudence.status import MAGIC, SEQ, StatusReader, StatusWriter
+
+NAMES = ['cpu', 'memory', 'swap', 'ü' * 20]
+
+
+class TestStatus(unittest.TestCase):
+    """Status writer and reader."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmpdir.name) / 'psprudence' / 'status'
+        self.writer = StatusWriter(NAMES, self.path)
+        self.reader = StatusReader(self.path)
+
+    def tearDown(self):
+        self.reader.close()
+        self.writer.close()
+        self.tmpdir.cleanup()
+
+    def test_names(self):
+        # cut at 32 bytes, on a character boundary
+        self.assertEqual(self.reader.names, NAMES[:3] + ['ü' * 16])
+
+    def test_publish(self):
+        stamp, values = self.reader.read()
+        self.assertTrue(all(isnan(value) for value, _ in values.values()))
+        self.writer.publish(12., [(1., 0), (2., 1), ('3', 2), (None, 4)])
+        stamp, values = self.reader.read()
+        self.assertEqual(stamp, 12.)
+        self.assertEqual(values['cpu'], (1., 'quiet'))
+        self.assertEqual(values['memory'], (2., 'alert'))
+        self.assertTrue(isnan(values['swap'][0]))
+        self.assertEqual(values['swap'][1], 'silenced')
+        self.assertEqual(values['ü' * 16][1], 'flagged')
+
+    def test_not_status(self):
+        self.path.write_bytes(b'\0' * 64)
+        with self.assertRaises(ValueError):
+            StatusReader(self.path)
+
+    def test_writer_busy(self):
+        (seq, ) = SEQ.unpack_from(self.writer._map, len(MAGIC))
+        SEQ.pack_into(self.writer._map, len(MAGIC), seq + 1)
+        with self.assertRaises(TimeoutError):
+            self.reader.read(retries=10)
+        SEQ.pack_into(self.writer._map, len(MAGIC), seq + 2)
+        self.reader.read(retries=10)
+
+    def test_seqlock(self):
+        """Readers never see a partial update."""
+        done = threading.Event()
+
+        def publish():
+            stamp = 0.
+            while not done.is_set():
+                stamp += 1
+                self.writer.publish(stamp, [(stamp, 1)] * len(NAMES))
+                sleep(0)  # let readers in, as between ticks
+
+        writer = threading.Thread(target=publish)
+        writer.start()
+        try:
+            for _ in range(2000):
+                stamp, values = self.reader.read(retries=100000)
+                for value, _ in values.values():
+                    if stamp:
+                        self.assertEqual(value, stamp)
+        finally:
+            done.set()
+            writer.join()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; mode: python; -*-
+# Copyright © 2022 Pradyumna Paranjape
+#
+# This file is part of psprudence.
+#
+# psprudence is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psprudence is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with psprudence. If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+Test binary traces.
+"""
+
+import tempfile
+import unittest
+from math import isnan
+from pathlib import Path
+
+from psprudence.prudence import OUTCOMES
+from psprudence.trace import (RECORD, Recorder, TraceReader, read_trace,
+                              write_header)
+
+NAMES = ['cpu', 'memory', 'température']
+
+
+class TestTrace(unittest.TestCase):
+    """Recorder → TraceReader round-trip."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmpdir.name) / 'trace.bin'
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def record(self, count: int, **kwargs):
+        recorder = Recorder(self.path, NAMES, **kwargs)
+        for idx in range(count):
+            recorder.record(float(idx), idx % len(NAMES),
+                            float(idx * 10) if idx % 7 else None,
+                            idx % len(OUTCOMES))
+        recorder.close()
+
+    def test_round_trip(self):
+        self.record(20)
+        reader = TraceReader(self.path)
+        self.assertEqual(reader.names, NAMES)
+        self.assertEqual(len(reader), 20)
+        samples = list(reader)
+        self.assertEqual(samples[3],
+                         (3., 'cpu', 30., OUTCOMES[3 % len(OUTCOMES)]))
+        self.assertEqual(samples[5].sensor, 'température')
+        self.assertTrue(isnan(samples[7].value))
+        self.assertEqual(reader[-1], samples[-1])
+        self.assertEqual(reader[4], samples[4])
+        with self.assertRaises(IndexError):
+            reader[20]
+        self.assertEqual(reader.bisect(4.5), 5)
+        self.assertEqual(reader.bisect(-1), 0)
+        self.assertEqual(reader.bisect(100), 20)
+        reader.close()
+
+    def test_append(self):
+        self.record(5)
+        self.record(5)
+        stamps = [sample.stamp for sample in read_trace(self.path)]
+        self.assertEqual(stamps, [0., 1., 2., 3., 4.] * 2)
+
+    def test_other_names(self):
+        self.record(5)
+        recorder = Recorder(self.path, ['disk'])
+        recorder.record(9., 0, 1., 0)
+        recorder.close()
+        self.assertEqual([sample.sensor for sample in read_trace(self.path)],
+                         ['disk'])
+        rotated = self.path.with_name('trace.bin.1')
+        self.assertEqual(len(list(read_trace(rotated))), 5)
+
+    def test_rotation(self):
+        header = len(write_header(NAMES))
+        self.record(30,
+                    flush_every=float('inf'),
+                    max_size=header + 4 * RECORD.size,
+                    keep=10)
+        count = len(list(self.path.parent.glob('trace.bin*')))
+        self.assertEqual(count, 8)
+        stamps = []
+        for age in range(count - 1, -1, -1):
+            path = self.path.with_name(
+                f'trace.bin.{age}') if age else self.path
+            self.assertLessEqual(path.stat().st_size,
+                                 header + 4 * RECORD.size)
+            stamps.extend(sample.stamp for sample in read_trace(path))
+        self.assertEqual(stamps, [float(idx) for idx in range(30)])